@@ -1,9 +1,9 @@
 import asyncio
 import ssl
-import struct
 import uuid
 from Events import Events
 from Files import File
+from Framing import LENGTH, read_exactly, write_framed
 from Options import Client_ops, SSLContextOps
 from Crypt import Crypt
 from TaskManager import AsyncTaskManager
@@ -51,8 +51,7 @@ class Client:
 
     async def send_file(self, file: File, bytes_block_length: int = 2048) -> None:
         await file.async_executor(file.compress_file)
-        await self.send_message(b"".join([chunk for chunk in await file.async_executor(file.read, bytes_block_length)]),
-                                bytes_block_length)
+        await self.send_message(file.file.read(), bytes_block_length)
 
     async def receive_file(self, bytes_block_length: int = 2048) -> File:
         file = File()
@@ -84,70 +83,24 @@ class Client:
         except Exception as e:
             pass
 
-        lng = len(message)
-        self.writer.write(await self.encoder(struct.pack("!Q", lng)))
-        await self.writer.drain()
-
-        if block:
-            self.writer.write(message)
-            await self.writer.drain()
-            return
-
-        offset = 0
-        while offset < lng:
-            self.writer.write(message[offset:offset + sent_bytes])
-            await self.writer.drain()
-            offset += sent_bytes
-
-    async def __extract_number(self, data):
-        if isinstance(data, (int, float)):
-            return data
-
-        if isinstance(data, (str, bytes)):
-            try:
-                return int(data)
-            except Exception as e:
-                pass
-
-        if isinstance(data, (bytes, bytearray)):
-            try:
-                decoded_value = struct.unpack("!Q", data)[0]
-                return decoded_value
-            except struct.error:
-                pass
+        # Cabeçalho cru, no mesmo formato dos endpoints com threads; o encoder só vale para o corpo
+        await write_framed(self.writer, LENGTH.pack(len(message)), message)
 
     async def receive_message(self, recv_bytes: int = 2048, block: bool = False):
-        lng = await self.reader.read(8)
-        length = await self.__extract_number(await self.decoder(lng))
-
-        if block:
-            message = self.reader.read(length)
-            try:
-                dec = await self.crypt.sync_crypt.async_executor(self.crypt.sync_crypt.decrypt_message, await self.decoder(message))
-                if await self.events.async_executor(self.events.size) > 0:
-                    await self.events.async_executor(self.events.scam, dec)
-                return dec
-            except Exception as e:
-                print(e)
-                return await self.decoder(message)
-
-        chunks = []
-        bytes_received = 0
-        while bytes_received < length:
-            chunk = await self.reader.read(recv_bytes)
-            if not chunk:
-                raise RuntimeError('Conexão interrompida')
-            chunks.append(chunk)
-            bytes_received += len(chunk)
-
-        res = b"".join(chunks)
+        raw_length = await read_exactly(self.reader, LENGTH.size, allow_eof=True)
+        if not raw_length:
+            return b""
+        # O cabeçalho trafega cru, como nos endpoints com threads: o decoder só vale para o corpo
+        (length,) = LENGTH.unpack(raw_length)
+        message = await read_exactly(self.reader, length)
+
         try:
-            dec = await self.crypt.sync_crypt.async_executor(self.crypt.sync_crypt.decrypt_message, await self.decoder(res))
+            dec = await self.crypt.sync_crypt.async_executor(self.crypt.sync_crypt.decrypt_message, await self.decoder(message))
             if await self.events.async_executor(self.events.size) > 0:
                 await self.events.async_executor(self.events.scam, dec)
             return dec
         except Exception as e:
-            return await self.decoder(res)
+            return await self.decoder(message)
 
     async def disconnect(self):
         self.writer.close()
@@ -1,11 +1,11 @@
 import socket
 import ssl
-import struct
 import threading
 import uuid
 from Abstracts.Auth import Auth
 from Events import Events
 from Files import File
+from Framing import open_message, prepare_message, recv_into_exactly, recv_length, send_framed
 from Options import Client_ops, SSLContextOps
 from Crypt import Crypt
 from Connection_type import Types
@@ -63,85 +63,34 @@ class Client(threading.Thread):
         file.decompress_bytes()
         return file
     
-    def __extract_number(self, data):
-        if isinstance(data, (int, float)):
-            return data
-
-        if isinstance(data, (str, bytes)):
-            try:
-                return int(data)
-            except Exception as e:
-                pass
-
-        if isinstance(data, (bytes, bytearray)):
-            try:
-                decoded_value = struct.unpack("!Q", data)[0]
-                return decoded_value
-            except struct.error:
-                pass
-
-    def receive_message(self, recv_bytes: int = 2048, block: bool = False) -> bytes:
-        raw_msglen = self.connection.recv(8)
-        if not raw_msglen:
+    def __open_message(self, message: bytes | bytearray) -> bytes | bytearray:
+        return open_message(message, self.crypt, self.decoder, self.events)
+
+    def receive_message(self, recv_bytes: int = 2048, block: bool = False) -> bytes | bytearray:
+        msglen = recv_length(self.connection)
+        if msglen is None:
             return b""
-        msglen = self.__extract_number(self.decoder(raw_msglen))
 
         if block:
-            message = self.connection.recv(msglen)
-            try:
-                dec_message = self.crypt.sync_crypt.decrypt_message(self.decoder(message))
-                if self.events.size() > 0:
-                    self.events.scam(dec_message)
-                return dec_message
-            except Exception as e:
-                return self.decoder(message)
-
-        chunks = []
-        bytes_received = 0
-        while bytes_received < msglen:
-            chunk = self.connection.recv(recv_bytes)
-            if not chunk:
-                raise RuntimeError('Conexão interrompida')
-            chunks.append(chunk)
-            bytes_received += len(chunk)
-
-        message = b"".join(chunks)
-        try:
-            dec_message = self.crypt.sync_crypt.decrypt_message(self.decoder(message))
-            if self.events.size() > 0:
-                self.events.scam(dec_message)
-            return dec_message
-        except Exception as e:
-            return self.decoder(message)
+            return self.__open_message(self.connection.recv(msglen))
 
-    def send_message(self, message: bytes, sent_bytes: int = 2048, block: bool = False) -> None:
-        try:
-            message = self.crypt.sync_crypt.encrypt_message(message)
-        except Exception as e:
-            pass
+        buffer = bytearray(msglen)
+        recv_into_exactly(self.connection, memoryview(buffer), recv_bytes)
 
-        try:
-            message = self.encoder(message)
-        except Exception as e:
-            pass
-        
-        msglen = len(message)
-        self.connection.sendall(self.encoder(struct.pack("!Q", msglen)))
+        # O próprio buffer da leitura segue adiante: nenhuma segunda cópia da mensagem inteira
+        return self.__open_message(buffer)
 
-        if block:
-            self.connection.sendall(message)
-            return
-
-        offset = 0
-        while offset < msglen:
-            sent = self.connection.send(message[offset:offset + sent_bytes])
-            if not sent:
-                raise RuntimeError('Conexão interrompida')
-            offset += sent
+    def send_message(self, message: bytes, sent_bytes: int = 2048, block: bool = False) -> None:
+        send_framed(self.connection, *prepare_message(message, self.crypt, self.encoder))
 
     def sync_crypt_key(self):
-        self.connection.sendall(self.encoder(self.crypt.async_crypt.public_key_to_bytes()))
-        enc_key = self.decoder(self.connection.recv(2048))
+        public_key = self.crypt.async_crypt.public_key_to_bytes()
+        if self.encoder is not None:
+            public_key = self.encoder(public_key)
+        self.connection.sendall(public_key)
+        enc_key = self.connection.recv(2048)
+        if self.decoder is not None:
+            enc_key = self.decoder(enc_key)
         key = self.crypt.async_crypt.decrypt_with_private_key(enc_key)
         self.crypt.sync_crypt.set_key(key)
 
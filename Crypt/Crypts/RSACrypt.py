@@ -1,4 +1,5 @@
 import asyncio
+import os
 from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable
 from Abstracts.AsyncCrypts import AsyncCrypts
@@ -8,6 +9,9 @@ from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 
+# Pool compartilhado para as operações RSA (CPU): uma thread por núcleo, criada uma única vez.
+# Um ProcessPoolExecutor não serve aqui: os objetos de chave do cryptography não podem ser serializados (pickle)
+_RSA_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='rsa')
 
 class RSACrypt(AsyncCrypts):
     def __init__(self, Options: AsyncCrypt_ops) -> None:
@@ -66,6 +70,4 @@ class RSACrypt(AsyncCrypts):
 
     async def async_executor(self, Call: Callable[..., Any], *args):
         loop = asyncio.get_running_loop()
-        with ThreadPoolExecutor() as executor:
-            res = await loop.run_in_executor(executor, Call, *args)
-        return res
+        return await loop.run_in_executor(_RSA_POOL, Call, *args)
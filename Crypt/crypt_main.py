@@ -1,12 +1,20 @@
+import threading
+from collections import OrderedDict
 from Options import Crypt_ops
 from Crypt import Sync
 from Crypt import Async
 
+# Máximo de chaves públicas de clientes mantidas já carregadas
+_PUBLIC_KEY_CACHE_SIZE = 4096
+
 
 class Crypt:
     def __init__(self):
         self.async_crypt = None
         self.sync_crypt = None
+        # Chaves públicas já carregadas, por bytes recebidos (LRU)
+        self.__public_keys: OrderedDict[bytes, object] = OrderedDict()
+        self.__public_keys_lock = threading.Lock()
 
     def configure(self, Options: Crypt_ops):
         try:
@@ -17,3 +25,17 @@ class Crypt:
                     Options.async_crypt_ops)
         except Exception as e:
             raise TypeError("Criptografia não encontrada ou não mapeada")
+
+    def load_public_key(self, public_key: bytes) -> object:
+        # Clientes que reconectam costumam enviar a mesma chave: evita refazer o parse do PEM
+        with self.__public_keys_lock:
+            key_obj = self.__public_keys.get(public_key)
+            if key_obj is not None:
+                self.__public_keys.move_to_end(public_key)
+                return key_obj
+        key_obj = self.async_crypt.load_public_key(public_key)
+        with self.__public_keys_lock:
+            self.__public_keys[public_key] = key_obj
+            if len(self.__public_keys) > _PUBLIC_KEY_CACHE_SIZE:
+                self.__public_keys.popitem(last=False)
+        return key_obj
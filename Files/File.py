@@ -1,9 +1,25 @@
-from concurrent.futures import ThreadPoolExecutor
 import os
 import asyncio
 from typing import Callable, Any
 import io
-import gzip
+
+try:
+    # ISA-L: mesma API do gzip, com Huffman e CRC32 acelerados por SIMD
+    from isal import igzip as gzip
+except ImportError:
+    import gzip
+
+try:
+    # Descompressão paralela de gzip com índice de pontos de acesso
+    import rapidgzip
+except ImportError:
+    rapidgzip = None
+
+# Tamanho dos blocos lidos e escritos durante a (des)compressão
+READ_BUFFER_SIZE = 128 * 1024
+
+# A partir deste tamanho (comprimido) a descompressão é dividida entre as threads do rapidgzip
+PARALLEL_DECOMPRESS_THRESHOLD = 10 * 1024 * 1024
 
 
 class File:
@@ -14,12 +30,33 @@ class File:
         self.encoding = encoding
 
     def compress_file(self):
-        bytes_c = gzip.compress(self.file.read())
-        self.file = io.BytesIO(bytes_c)
+        # Comprime em blocos: o arquivo original nunca fica inteiro na memória
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb') as gz:
+            for chunk in iter(lambda: self.file.read(READ_BUFFER_SIZE), b''):
+                gz.write(chunk)
+        buffer.seek(0)
+        self.file = buffer
+
+    def _remaining_size(self) -> int:
+        # Bytes ainda não lidos do arquivo/buffer atual
+        position = self.file.tell()
+        end = self.file.seek(0, io.SEEK_END)
+        self.file.seek(position)
+        return end - position
 
     def decompress_bytes(self):
-        bytes_d = gzip.decompress(self.file.read())
-        self.file = io.BytesIO(bytes_d)
+        # Descomprime em blocos a partir do próprio buffer, sem copiar os bytes comprimidos
+        buffer = io.BytesIO()
+        if rapidgzip is not None and self._remaining_size() >= PARALLEL_DECOMPRESS_THRESHOLD:
+            gz = rapidgzip.open(self.file, parallelization=os.cpu_count() or 1)
+        else:
+            gz = gzip.GzipFile(fileobj=self.file, mode='rb')
+        with gz:
+            for chunk in iter(lambda: gz.read(READ_BUFFER_SIZE), b''):
+                buffer.write(chunk)
+        buffer.seek(0)
+        self.file = buffer
 
     def save(self, override: bool = False):
         if self.path and (not os.path.exists(self.path) or override):
@@ -89,10 +126,8 @@ class File:
         return os.path.realpath(self.path)
 
     async def async_executor(self, Call: Callable[..., Any], *args):
-        loop = asyncio.get_running_loop()
-        with ThreadPoolExecutor() as executor:
-            res = await loop.run_in_executor(executor, Call, *args)
-        return res
+        # Executor padrão do loop: criado uma única vez e compartilhado, propagando o contexto (contextvars)
+        return await asyncio.to_thread(Call, *args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+import asyncio
+import socket
+import ssl
+import struct
+from typing import Callable
+
+# Cabeçalho de comprimento das mensagens, com o formato compilado uma única vez.
+# O comprimento trafega cru em todos os endpoints (threads e asyncio), sem passar pelo encoder
+LENGTH = struct.Struct("!Q")
+
+# A partir deste tamanho o corpo não é concatenado ao cabeçalho: ambos seguem juntos via sendmsg (scatter-gather)
+_SCATTER_GATHER_THRESHOLD = 10 * 1024
+_HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')
+
+
+def prepare_message(message: bytes, crypt, encoder: Callable[[bytes], bytes] | None) -> tuple[bytes, bytes]:
+    """
+    Aplica a criptografia e o encoder (quando configurados) e devolve o cabeçalho de comprimento e o corpo.
+    """
+    # bytes -> bytes do início ao fim: sem ida e volta por str
+    if crypt is not None:
+        message = crypt.sync_crypt.encrypt_message(message)
+    if encoder is not None:
+        message = encoder(message)
+    return LENGTH.pack(len(message)), message
+
+
+def open_message(message: bytes | bytearray, crypt, decoder: Callable[[bytes], bytes] | None, events) -> bytes | bytearray:
+    """
+    Desfaz o encoder e a criptografia (quando configurados) e dispara os eventos da mensagem recebida.
+    O corpo pode chegar no próprio bytearray da leitura: sem crypt, ele é devolvido sem cópia.
+    """
+    if decoder is not None:
+        message = decoder(message)
+    if crypt is None:
+        return message
+    try:
+        # As cifras (Fernet) exigem bytes: a conversão acontece só aqui
+        dec_message = crypt.sync_crypt.decrypt_message(message if isinstance(message, bytes) else bytes(message))
+    except Exception as e:
+        return message
+    if events.size() > 0:
+        events.scam(dec_message)
+    return dec_message
+
+
+def send_framed(connection: socket.socket | ssl.SSLSocket, header: bytes, message: bytes) -> None:
+    if len(message) >= _SCATTER_GATHER_THRESHOLD and _HAS_SENDMSG and not isinstance(connection, ssl.SSLSocket):
+        # Mensagens grandes: cabeçalho e corpo vão ao kernel em um único sendmsg, sem concatená-los antes
+        sendmsg_all(connection, header, message)
+        return
+    # Comprimento e corpo saem juntos em um único sendall: menos syscalls e nenhum cabeçalho isolado
+    # esperando o ACK do corpo (Nagle x ACK atrasado)
+    connection.sendall(header + message)
+
+
+def sendmsg_all(connection: socket.socket, *buffers: bytes) -> None:
+    # sendmsg pode enviar só parte dos buffers: descarta o que já saiu e repete com o restante
+    views = [memoryview(buffer) for buffer in buffers]
+    while views:
+        sent = connection.sendmsg(views)
+        if not sent:
+            raise RuntimeError('Conexão interrompida')
+        while views and sent >= len(views[0]):
+            sent -= len(views.pop(0))
+        if sent:
+            views[0] = views[0][sent:]
+
+
+def recv_into_exactly(connection: socket.socket | ssl.SSLSocket, view: memoryview, recv_bytes: int) -> None:
+    """
+    Preenche o buffer inteiro direto do socket (sem lista de pedaços + join), em leituras de até recv_bytes.
+    """
+    size = len(view)
+    bytes_received = 0
+    while bytes_received < size:
+        received = connection.recv_into(view[bytes_received:], min(recv_bytes, size - bytes_received))
+        if not received:
+            raise RuntimeError('Conexão interrompida')
+        bytes_received += received
+
+
+def recv_length(connection: socket.socket | ssl.SSLSocket) -> int | None:
+    """
+    Lê o cabeçalho de comprimento inteiro (um recv pode devolver menos de 8 bytes).
+    Retorna None quando a conexão fecha antes do primeiro byte.
+    """
+    header = bytearray(LENGTH.size)
+    view = memoryview(header)
+    received = connection.recv_into(view)
+    if not received:
+        return None
+    recv_into_exactly(connection, view[received:], LENGTH.size)
+    return LENGTH.unpack(header)[0]
+
+
+async def read_exactly(reader: asyncio.StreamReader, size: int, allow_eof: bool = False) -> bytes:
+    """
+    readexactly nunca devolve menos que o pedido: os bytes chegam inteiros ou a conexão caiu.
+    Com allow_eof, o fim da conexão antes do primeiro byte devolve b"" em vez de erro.
+    """
+    try:
+        return await reader.readexactly(size)
+    except asyncio.IncompleteReadError as e:
+        if allow_eof and not e.partial:
+            return b""
+        raise RuntimeError('Conexão interrompida')
+
+
+async def write_framed(writer: asyncio.StreamWriter, header: bytes, message: bytes) -> None:
+    # Comprimento e corpo entregues juntos ao transporte (sem fatiar nem concatenar), com um único drain
+    writer.writelines((header, message))
+    await writer.drain()
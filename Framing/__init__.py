@@ -0,0 +1 @@
+from Framing.Framing import LENGTH, open_message, prepare_message, read_exactly, recv_into_exactly, recv_length, send_framed, sendmsg_all, write_framed
@@ -1,7 +1,11 @@
 import ssl
 from Abstracts.Auth import Auth
 from Connection_type.Types import Types
-from typing import Callable, Any
+from typing import Awaitable, Callable
+
+# encoder/decoder transformam o corpo das mensagens (bytes -> bytes): funções comuns nos endpoints
+# com threads e corrotinas nos assíncronos. O cabeçalho de comprimento nunca passa por eles
+Codec = Callable[[bytes], bytes] | Callable[[bytes], Awaitable[bytes]]
 
 
 class SyncCrypt_ops:
@@ -36,7 +40,8 @@ class SSLContextOps:
 class Server_ops:
     def __init__(self, host: str = "127.0.0.1", port: int = 8080, encrypt_configs: Crypt_ops = None,
                  conn_type: Types | tuple | None = Types.TCP_IPV4, ssl_ops: SSLContextOps = None,
-                 auth: Auth = None, encoder: Callable[..., Any] = None, decoder: Callable[..., Any] = None) -> None:
+                 auth: Auth = None, encoder: Codec | None = None, decoder: Codec | None = None,
+                 reuse_port: bool = False, engines: int = 1) -> None:
         self.host = host
         self.port = port
         self.conn_type = conn_type
@@ -45,12 +50,16 @@ class Server_ops:
         self.auth = auth
         self.encoder = encoder
         self.decoder = decoder
+        # SO_REUSEPORT é opcional: sem ele, um segundo servidor na mesma porta falha com EADDRINUSE
+        self.reuse_port = reuse_port
+        # Laços de accept (um socket SO_REUSEPORT cada); só vale com reuse_port
+        self.engines = engines
 
 
 class Client_ops:
     def __init__(self, host: str = "127.0.0.1", port: int = 8080, encrypt_configs: Crypt_ops = None,
                  conn_type: Types | tuple | None = Types.TCP_IPV4, ssl_ops: SSLContextOps = None,
-                 auth: Auth = None, encoder: Callable[..., Any] = None, decoder: Callable[..., Any] = None) -> None:
+                 auth: Auth = None, encoder: Codec | None = None, decoder: Codec | None = None) -> None:
         self.host = host
         self.port = port
         self.conn_type = conn_type
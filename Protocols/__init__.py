@@ -1,4 +1,24 @@
-from Protocols.protocols.httpServerProtocol import HttpServerProtocol
-from Protocols.protocols.websocket.client import WebSocketClient
-from Protocols.protocols.websocket.server import WebSocketServer
-from Protocols.configure import config
+import importlib
+
+# Os protocolos são importados apenas no primeiro acesso (PEP 562): quem usa só o cliente WebSocket
+# não paga pela importação do servidor HTTP (ssl, logging, mimetypes...)
+_LAZY = {
+    'HttpServerProtocol': 'Protocols.protocols.httpServerProtocol',
+    'WebSocketClient': 'Protocols.protocols.websocket.client',
+    'WebSocketServer': 'Protocols.protocols.websocket.server',
+    'config': 'Protocols.configure',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -1,6 +1,11 @@
-from Protocols import HttpServerProtocol
-from Protocols import WebSocketClient
-from Protocols import WebSocketServer
+import importlib
+
+# Nome do protocolo -> (módulo, classe); o módulo só é importado quando o protocolo é pedido
+_PROTOCOLS = {
+    "http": ("Protocols.protocols.httpServerProtocol", "HttpServerProtocol"),
+    "websocket_client": ("Protocols.protocols.websocket.client", "WebSocketClient"),
+    "websocket_server": ("Protocols.protocols.websocket.server", "WebSocketServer"),
+}
 
 def config(proto: str):
     """Protocols
@@ -9,7 +14,6 @@ def config(proto: str):
     Returns:
         Protocol Class: A class of protocol
     """
-    protocols = {"http": HttpServerProtocol, "websocket_client": WebSocketClient,
-                "websocket_server": WebSocketServer}
+    module, name = _PROTOCOLS[proto.lower()]
 
-    return protocols[proto.lower()]
+    return getattr(importlib.import_module(module), name)
@@ -1,24 +1,280 @@
 import asyncio
+import atexit
 from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+import functools
 import http.client
 import http.server
 import logging
+import logging.handlers
 import mimetypes
+import mmap
 import os
-from urllib.parse import urlparse
+import queue
+import ssl
+import stat
+import threading
+import weakref
+from urllib.parse import parse_qsl, urlparse
 import re
+import shutil
+import socket
 from typing import Any, Callable
 
+_LOG_FORMAT = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+# Segmento de rota no formato {tipo: nome}
+_PARAM_SEGMENT = re.compile(r"{(?P<type>\w+): (?P<name>\w+)}")
+
+# Expressão usada para capturar cada tipo de parâmetro dentro de um único segmento
+_TYPE_PATTERNS = {
+    'int': r'-?\d+',
+    'float': r'-?\d+(?:\.\d+)?',
+    'str': r'[^/]+',
+    'bool': r'[^/]+'
+}
+
+_TYPE_REGEXES = {var_type: re.compile(pattern) for var_type, pattern in _TYPE_PATTERNS.items()}
+
+# Acima deste tamanho arquivos servidos por TLS são mapeados em memória em vez de lidos inteiros
+_MMAP_THRESHOLD = 64 * 1024
+_MMAP_CHUNK_SIZE = 256 * 1024
+
+# Tamanho do buffer de escrita de cada conexão HTTP
+_WRITE_BUFFER_SIZE = 64 * 1024
+
+# Disponível apenas no Linux; nas demais plataformas os cabeçalhos seguem sem agrupamento
+_TCP_CORK = getattr(socket, 'TCP_CORK', None)
+
+# Corpos não lidos pelo handler até este tamanho são descartados para manter a conexão; acima disso ela é fechada
+_MAX_DISCARD_BODY = 64 * 1024
+
+# Content-Type das extensões estáticas mais comuns, evitando mimetypes.guess_type por requisição
+_STATIC_CONTENT_TYPES = {
+    '.ico': 'image/x-icon',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8'
+}
+
+# Extensões típicas de arquivos estáticos
+_STATIC_EXTENSIONS = tuple(_STATIC_CONTENT_TYPES)
+
+# Extensões estáticas de texto que podem ter variantes pré-comprimidas no disco (arquivo.css.br, arquivo.css.gz);
+# só extensões de _STATIC_CONTENT_TYPES chegam a serve_static_file
+_COMPRESSIBLE_EXTENSIONS = frozenset({'.css', '.js'})
+
+# Codificações pré-comprimidas em ordem de preferência, com o sufixo do arquivo correspondente
+_PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_TYPE_CONVERTERS = {
+    'int': int,
+    'str': str,
+    'float': float,
+    'bool': bool
+}
+
+
+# Um QueueListener por arquivo de log; a escrita em disco acontece fora das threads de requisição
+_LOG_LISTENERS: dict[str, logging.handlers.QueueListener] = {}
+
+
+def _stop_log_listeners() -> None:
+    # Esvazia as filas antes de o interpretador encerrar para não perder registros
+    for listener in _LOG_LISTENERS.values():
+        listener.stop()
+    _LOG_LISTENERS.clear()
+
+
+atexit.register(_stop_log_listeners)
+
+# Servidores ainda não encerrados; referências fracas não prolongam a vida das instâncias
+_OPEN_SERVERS: 'weakref.WeakSet[HttpServerProtocol]' = weakref.WeakSet()
+
+
+def _close_open_servers() -> None:
+    # Servidores rodando em threads daemon nunca saem do serve_forever: o encerramento fica para a saída
+    for server in list(_OPEN_SERVERS):
+        server.close()
+
+
+atexit.register(_close_open_servers)
+
+
+def _configure_logger(logger: logging.Logger, logging_path: str) -> None:
+    # As requisições apenas enfileiram o registro; uma thread de fundo escreve no arquivo
+    logging_path = os.path.abspath(logging_path)
+    for handler in logger.handlers:
+        if isinstance(handler, logging.handlers.QueueHandler) and getattr(handler, 'logging_path', None) == logging_path:
+            return
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.logging_path = logging_path
+    file_handler = logging.FileHandler(logging_path)
+    file_handler.setFormatter(_LOG_FORMAT)
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    _LOG_LISTENERS[logging_path] = listener
+    logger.addHandler(queue_handler)
+    logger.setLevel(logging.INFO)
+
+
+@functools.lru_cache(maxsize=256)
+def _content_type_for(ext: str) -> str:
+    """
+    Resolve o Content-Type de uma extensão, consultando mimetypes apenas uma vez por extensão fora da tabela.
+    """
+    mime_type = _STATIC_CONTENT_TYPES.get(ext)
+    if mime_type is None:
+        mime_type, _ = mimetypes.guess_type('file' + ext)
+    return mime_type or 'application/octet-stream'  # Tipo genérico se não for possível determinar
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_route(url: str) -> tuple[re.Pattern, dict[str, Callable[[str], Any]]]:
+    """
+    Compila a rota em uma única expressão ancorada e devolve os conversores de cada parâmetro.
+    """
+    parts = []
+    converters = {}
+    for segment in url.rstrip('/').split('/'):
+        match = _PARAM_SEGMENT.fullmatch(segment)
+        if match is None:
+            # Segmentos literais são escapados para que '.', '+' etc. não virem metacaracteres
+            parts.append(re.escape(segment))
+            continue
+        var_type, var_name = match['type'], match['name']
+        if var_type not in _TYPE_PATTERNS:
+            raise ValueError(f"Tipo {var_type} não suportado.")
+        parts.append(f"(?P<{var_name}>{_TYPE_PATTERNS[var_type]})")
+        converters[var_name] = _TYPE_CONVERTERS[var_type]
+    return re.compile('^' + '/'.join(parts) + '/?$'), converters
+
+
+class Route:
+    """
+    Registro de uma rota; atributos em __slots__ evitam as consultas a dicionário no despacho.
+    """
+    __slots__ = ('path', 'segments', 'func', 'is_async', 'method')
+
+    def __init__(self, method: str, path: str, func: Callable[..., Any]) -> None:
+        self.method = method
+        self.path = path
+        self.func = func
+        self.segments = tuple(filter(None, path.split("/")))
+        self.is_async = asyncio.iscoroutinefunction(func)
+
+    def __repr__(self) -> str:
+        return f"Route({self.method} {self.path} -> {getattr(self.func, '__name__', self.func)})"
+
+
+class _RequestBody:
+    """
+    Envolve o rfile da requisição: a leitura para no fim do corpo (Content-Length) e o que sobrou fica contado.
+    """
+    __slots__ = ('rfile', 'remaining')
+
+    def __init__(self, rfile, length: int) -> None:
+        self.rfile = rfile
+        self.remaining = length
+
+    def _limit(self, size: int | None) -> int:
+        if size is None or size < 0 or size > self.remaining:
+            return self.remaining
+        return size
+
+    def read(self, size: int | None = -1) -> bytes:
+        size = self._limit(size)
+        data = self.rfile.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def readline(self, size: int | None = -1) -> bytes:
+        size = self._limit(size)
+        data = self.rfile.readline(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast('B')
+        size = self._limit(len(view))
+        received = self.rfile.readinto(view[:size]) if size else 0
+        self.remaining -= received
+        return received
+
+    def __getattr__(self, name: str):
+        return getattr(self.rfile, name)
+
+
+class _RouteNode:
+    """
+    Nó da árvore de rotas: filhos literais indexados pelo segmento e filhos de parâmetro {tipo: nome}.
+    """
+    __slots__ = ('children', 'params', 'routes')
+
+    def __init__(self) -> None:
+        self.children: dict[str, _RouteNode] = {}
+        self.params: dict[str, tuple[str, re.Pattern, Callable[[str], Any], _RouteNode]] = {}
+        self.routes: list[Route] = []
+
+    def insert(self, segments: tuple[str, ...], route: Route) -> None:
+        node = self
+        for segment in segments:
+            match = _PARAM_SEGMENT.fullmatch(segment)
+            if match is None:
+                node = node.children.setdefault(segment, _RouteNode())
+                continue
+            var_type, var_name = match['type'], match['name']
+            if var_type not in _TYPE_REGEXES:
+                raise ValueError(f"Tipo {var_type} não suportado.")
+            if segment not in node.params:
+                node.params[segment] = (var_name, _TYPE_REGEXES[var_type], _TYPE_CONVERTERS[var_type], _RouteNode())
+            node = node.params[segment][3]
+        node.routes.append(route)
+
+    def match(self, segments: tuple[str, ...], index: int = 0, parsed_vars: dict | None = None):
+        """
+        Percorre a árvore segmento a segmento, preferindo literais a parâmetros e voltando atrás
+        quando um ramo não leva a nenhuma rota. Retorna (rotas, variáveis) ou None.
+        """
+        if parsed_vars is None:
+            parsed_vars = {}
+        if index == len(segments):
+            return (self.routes, parsed_vars) if self.routes else None
+
+        segment = segments[index]
+        child = self.children.get(segment)
+        if child is not None:
+            result = child.match(segments, index + 1, parsed_vars)
+            if result is not None:
+                return result
+
+        for var_name, regex, converter, child in self.params.values():
+            if regex.fullmatch(segment) is None:
+                continue
+            parsed_vars[var_name] = converter(segment)
+            result = child.match(segments, index + 1, parsed_vars)
+            if result is not None:
+                return result
+            del parsed_vars[var_name]
+        return None
+
 
 class HttpServerProtocol:
     def __init__(self, host: str = 'localhost', port: int = 8080, logging_path: str = "./server.log", static_dir: str = "./static") -> None:
         self.host = host
         self.port = port
         self.static_dir = static_dir
-        self.regex_find_var_parameters = re.compile(r"/{(?P<type>\w+): (?P<name>\w+)}")
-        logging.basicConfig(filename=logging_path, level=logging.INFO,
-                            format='%(asctime)s - %(levelname)s - %(message)s')
-        self.logger = logging.getLogger(__name__)
+        # Raiz real da pasta estática resolvida uma única vez na inicialização
+        self._static_root = os.path.realpath(static_dir)
+        self._static_root_prefix = os.path.join(self._static_root, '')
+        # Um logger por arquivo de log: instâncias com caminhos diferentes não escrevem nos arquivos umas das outras
+        logging_path = os.path.abspath(logging_path)
+        self.logger = logging.getLogger(f"{__name__}.{logging_path}")
+        _configure_logger(self.logger, logging_path)
         self.http_server_methods = {
             'GET': [],
             'POST': [],
@@ -27,6 +283,16 @@ class HttpServerProtocol:
             'DELETE': [],
             'OPTION': []
         }
+        # Pool compartilhado durante toda a vida do servidor; as threads são criadas sob demanda
+        self._executor = ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 4, thread_name_prefix='http')
+        # Um loop de eventos por thread de conexão para os handlers assíncronos: uma conexão lenta não
+        # bloqueia as requisições assíncronas das outras
+        self._loops = threading.local()
+        # Uma árvore de rotas por método: o despacho custa O(profundidade do caminho)
+        self._route_trees = {method: _RouteNode() for method in self.http_server_methods}
+        self._exact_routes: dict[str, dict[tuple[str, ...], Route]] = {method: {} for method in self.http_server_methods}
+        self._closed = False
+        _OPEN_SERVERS.add(self)
 
     def request(self, method: str, url: str, headers: dict[str, str] = None,
                 body: str = None) -> http.client.HTTPResponse:
@@ -53,204 +319,381 @@ class HttpServerProtocol:
             response = conn.getresponse()
             return response
         except Exception as e:
-            self.logger.error(f"An error occurred: {e}")
+            self.logger.error("An error occurred: %s", e)
             raise
 
     def start_http_server(self):
         server_address = (self.host, self.port)
         handler_class = self._make_http_handler()
-        httpd = http.server.HTTPServer(server_address, handler_class)
-        self.logger.info(f"Starting server on {self.host}:{self.port}")
-        httpd.serve_forever()
+        # Cada conexão é atendida na sua própria thread; uma requisição lenta não bloqueia as demais
+        httpd = http.server.ThreadingHTTPServer(server_address, handler_class)
+        self.logger.info("Starting server on %s:%s", self.host, self.port)
+        try:
+            httpd.serve_forever()
+        finally:
+            httpd.server_close()
+            self.close()
+
+    def close(self) -> None:
+        """
+        Encerra o pool de threads compartilhado; depois disso nenhum handler assíncrono é executado.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        _OPEN_SERVERS.discard(self)
+        self._executor.shutdown(wait=False, cancel_futures=True)
     
-    def extract_params_from_patern_in_url(self, url: str, method_url: str):
-        type_mapping = {
-            'int': int,
-            'str': str,
-            'float': float,
-            'bool': bool
-        }
-        parsed_url = urlparse(url)
-        path = parsed_url.path
-        path_parts = [part for part in path.split("/") if part]
-        matches = self.regex_find_var_parameters.findall(method_url)
-        values = path_parts[-len(matches):]
-        if not matches:
+    @staticmethod
+    def extract_params_from_patern_in_url(url: str, method_url: str):
+        regex, converters = _compile_route(method_url)
+        match = regex.match(urlparse(url).path)
+        if match is None:
             return {}
-        
-        parsed_vars = {}
-        
-        for i in range(max(len(matches), len(values))):
-            var_type, var_name = matches[i]
-            value = values[i]
-            try:
-                parsed_vars[var_name] = type_mapping[var_type](value)
-            except KeyError:
-                raise ValueError(f"Tipo {var_type} não suportado.")
-            except ValueError:
-                raise ValueError(f"Falha ao converter '{value}' para {var_type}.")
-        
-        return parsed_vars
+        return {name: converters[name](value) for name, value in match.groupdict().items()}
     
     def parse_path(self, handler):
         url_components = urlparse(handler.path)
         path: str = url_components.path
-        query_params = dict([param.split('=') for param in url_components.query.split('&') if '=' in param])
+        query_params = dict(parse_qsl(url_components.query, keep_blank_values=True))
         return [path, query_params]
 
-    def find_functions_to_run(self, method: str, path: str):
-        result = []
-        for funciton in self.http_server_methods[method]:
-            parsed_url = urlparse(path).path
-            parsed_url_parts = [part for part in parsed_url.split("/") if part]
-            # ---
-            parsed_url_method = urlparse(funciton['path']).path
-            parsed_url_method_parts = [part for part in parsed_url_method.split("/") if part]
+    def find_functions_to_run(self, method: str, path: str, segments: tuple[str, ...] | None = None):
+        """
+        Gera os handlers candidatos para o caminho, começando pela rota exata (sem parâmetros), se houver.
+        """
+        if segments is None:
+            segments = tuple(filter(None, path.split("/")))
+        route = self._exact_routes[method].get(segments)
+        if route is not None:
+            yield route, {}
+            return
+
+        result = self._route_trees[method].match(segments)
+        if result is not None:
+            routes, parsed_vars = result
+            for route in routes:
+                yield route, parsed_vars
 
-            matches = self.regex_find_var_parameters.findall(funciton['path'])
+    def _handle_method(self, handler, method: str):
+        body = self._wrap_request_body(handler)
+        try:
+            self._dispatch_method(handler, method)
+        finally:
+            self._finish_request_body(handler, body)
 
-            if len(parsed_url_parts) != len(parsed_url_method_parts):
-                continue
+    @staticmethod
+    def _wrap_request_body(handler) -> _RequestBody | None:
+        """
+        Limita a leitura do rfile ao corpo da requisição; corpos sem tamanho conhecido encerram a conexão no fim.
+        """
+        if handler.headers.get('Transfer-Encoding') is not None:
+            # Corpo em chunks: não há como saber onde a próxima requisição começa
+            return None
+        content_length = handler.headers.get('Content-Length')
+        if content_length is None:
+            return None
+        content_length = content_length.strip()
+        if not content_length.isdigit():
+            return None
+        body = _RequestBody(handler.rfile, int(content_length))
+        handler.rfile = body
+        return body
+
+    @staticmethod
+    def _finish_request_body(handler, body: _RequestBody | None) -> None:
+        """
+        Garante que a próxima requisição da conexão comece depois do corpo desta (sem dessincronizar o parser).
+        """
+        if body is None:
+            if handler.headers.get('Transfer-Encoding') is not None or handler.headers.get('Content-Length') is not None:
+                handler.close_connection = True
+            return
+        handler.rfile = body.rfile
+        if not body.remaining:
+            return
+        if body.remaining > _MAX_DISCARD_BODY:
+            handler.close_connection = True
+            return
+        # Corpo não lido pelo handler (ou respondido pelo próprio servidor): descarta o restante
+        try:
+            while body.remaining and body.read(body.remaining):
+                pass
+        except OSError:
+            pass
+        if body.remaining:
+            handler.close_connection = True
+
+    def _dispatch_method(self, handler, method: str):
+        if not self.http_server_methods[method]:
+            self._send_text_response(handler, 404, b"Method Not Allowed")
+            return
+
+        # O caminho é extraído uma única vez e reaproveitado pelo arquivo estático e pelo roteamento
+        params = self.parse_path(handler)
+        if method == 'GET' and self.is_static_file(params[0]):
+            self.serve_static_file(handler, params[0])
+            return
 
-            if path == funciton['path'] or parsed_url_parts[:len(parsed_url_method_parts)-len(matches)] == parsed_url_method_parts[:len(parsed_url_method_parts)-len(matches)]:
-                result.append(funciton)
-        return result
+        # Apenas o primeiro handler que casar com o caminho atende a requisição
+        # Os segmentos são separados uma única vez; as rotas já guardam os seus desde o registro
+        segments = tuple(filter(None, params[0].split("/")))
+        found = next(self.find_functions_to_run(method, params[0], segments), None)
+        if found is None:
+            self._send_text_response(handler, 404, b"Not Found")
+            return
+
+        route, vars = found
+        params.append(vars)
+        if route.is_async:
+            self._get_loop().run_until_complete(route.func(handler, params=params))
+        else:
+            route.func(handler, params=params)
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Retorna o loop de eventos da thread atual, criado na primeira requisição assíncrona da conexão.
+        """
+        if self._closed:
+            raise RuntimeError("Servidor encerrado")
+        loop = getattr(self._loops, 'loop', None)
+        if loop is None:
+            loop = self._loops.loop = asyncio.new_event_loop()
+        return loop
+
+    def _close_loop(self) -> None:
+        """
+        Fecha o loop de eventos da thread atual, se a conexão chegou a criar um.
+        """
+        loop = getattr(self._loops, 'loop', None)
+        if loop is not None:
+            self._loops.loop = None
+            loop.close()
     
     def is_static_file(self, path: str) -> bool:
         """
         Verifica se o caminho da requisição é para um arquivo estático.
         """
-        # Extensões típicas de arquivos estáticos
-        static_extensions = ['.ico', '.png', '.jpg', '.jpeg', '.gif', '.css', '.js']
-        
-        # Verifica se o caminho tem uma extensão de arquivo estático
-        return any(path.endswith(ext) for ext in static_extensions)
+        # Verifica se o caminho tem uma extensão de arquivo estático (um único endswith com tupla)
+        return path.endswith(_STATIC_EXTENSIONS)
+
+
+    @staticmethod
+    def _send_text_response(handler, status: int, body: bytes):
+        """
+        Envia uma resposta curta gerada pelo próprio servidor, sempre com Content-Length para manter a conexão.
+        """
+        handler.send_response(status)
+        handler.send_header('Content-type', 'text/html')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    @staticmethod
+    def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+        """
+        Verifica se o cabeçalho If-None-Match contém a ETag atual do arquivo.
+        """
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        return etag in (tag.strip() for tag in if_none_match.split(','))
 
+    @staticmethod
+    def _not_modified_since(if_modified_since: str | None, mtime: float) -> bool:
+        """
+        Verifica se o arquivo não mudou desde a data enviada em If-Modified-Since (resolução de segundos).
+        """
+        if not if_modified_since:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return int(mtime) <= since.timestamp()
+
+    @staticmethod
+    def _accepted_encodings(accept_encoding: str | None) -> set[str]:
+        """
+        Extrai as codificações aceitas pelo cliente, descartando as marcadas com q=0.
+        """
+        encodings = set()
+        if not accept_encoding:
+            return encodings
+        for item in accept_encoding.split(','):
+            name, _, params = item.partition(';')
+            params = params.replace(' ', '')
+            if params in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                continue
+            encodings.add(name.strip().lower())
+        return encodings
 
     def serve_static_file(self, handler, path: str):
         """
         Serve arquivos estáticos a partir da pasta 'static'.
         """
-        # Remove a barra inicial (/) para acessar o caminho relativo
-        if path.startswith('/'):
-            path = path[1:]
-        
+        # Remove as barras iniciais (/) para acessar o caminho relativo
+        path = path.lstrip('/')
+
         # Gera o caminho completo para o arquivo estático
-        file_path = os.path.join(self.static_dir, path)
+        file_path = os.path.join(self._static_root, path)
+        # Depois do status não há como trocar a resposta: um erro só pode encerrar a conexão
+        response_started = False
 
         try:
-            # Verifica se o arquivo existe
-            if os.path.exists(file_path) and os.path.isfile(file_path):
-                # Determina o tipo MIME do arquivo
-                mime_type, _ = mimetypes.guess_type(file_path)
-                if mime_type is None:
-                    mime_type = 'application/octet-stream'  # Tipo genérico se não for possível determinar
-                
-                # Lê o arquivo e envia a resposta
-                with open(file_path, 'rb') as f:
-                    handler.send_response(200)
-                    handler.send_header('Content-type', mime_type)
-                    handler.end_headers()
-                    handler.wfile.write(f.read())
-            else:
+            # Só caminhos com '..' podem escapar da raiz; os demais dispensam o realpath
+            if '..' in path:
+                file_path = os.path.realpath(file_path)
+                if not file_path.startswith(self._static_root_prefix):
+                    self._send_text_response(handler, 404, b'File Not Found')
+                    return
+
+            # Um único stat responde existência, tipo e metadados usados na resposta
+            try:
+                st = os.stat(file_path)
+            except (FileNotFoundError, NotADirectoryError):
+                st = None
+
+            if st is None or not stat.S_ISREG(st.st_mode):
                 # Arquivo não encontrado
-                handler.send_response(404)
-                handler.send_header('Content-type', 'text/html')
+                self._send_text_response(handler, 404, b'File Not Found')
+                return
+
+            # Determina o tipo MIME do arquivo
+            ext = os.path.splitext(file_path)[1].lower()
+            mime_type = _content_type_for(ext)
+
+            # Serve a variante pré-comprimida (.br/.gz) quando o cliente aceita, sem comprimir em tempo de execução
+            content_encoding = None
+            if ext in _COMPRESSIBLE_EXTENSIONS:
+                accepted = self._accepted_encodings(handler.headers.get('Accept-Encoding'))
+                for encoding, suffix in _PRECOMPRESSED_ENCODINGS:
+                    if encoding not in accepted:
+                        continue
+                    try:
+                        variant_st = os.stat(file_path + suffix)
+                    except (FileNotFoundError, NotADirectoryError):
+                        continue
+                    if stat.S_ISREG(variant_st.st_mode):
+                        file_path, st, content_encoding = file_path + suffix, variant_st, encoding
+                        break
+
+            # ETag fraca derivada de tamanho e mtime, sem precisar ler o conteúdo; cada codificação tem a sua
+            etag = f'W/"{st.st_size:x}-{st.st_mtime_ns:x}{"-" + content_encoding if content_encoding else ""}"'
+
+            # O cliente já possui a versão atual: responde 304 sem tocar no arquivo.
+            # If-Modified-Since só é considerado quando não há If-None-Match (RFC 9110)
+            if_none_match = handler.headers.get('If-None-Match')
+            if (self._etag_matches(if_none_match, etag) if if_none_match is not None
+                    else self._not_modified_since(handler.headers.get('If-Modified-Since'), st.st_mtime)):
+                response_started = True
+                handler.send_response(304)
+                handler.send_header('ETag', etag)
+                handler.send_header('Last-Modified', formatdate(st.st_mtime, usegmt=True))
+                if ext in _COMPRESSIBLE_EXTENSIONS:
+                    handler.send_header('Vary', 'Accept-Encoding')
+                handler.end_headers()
+                return
+
+            # Lê o arquivo e envia a resposta
+            with open(file_path, 'rb') as f:
+                response_started = True
+                handler.send_response(200)
+                handler.send_header('Content-type', mime_type)
+                handler.send_header('Content-Length', str(st.st_size))
+                if content_encoding:
+                    handler.send_header('Content-Encoding', content_encoding)
+                if ext in _COMPRESSIBLE_EXTENSIONS:
+                    handler.send_header('Vary', 'Accept-Encoding')
+                handler.send_header('ETag', etag)
+                handler.send_header('Last-Modified', formatdate(st.st_mtime, usegmt=True))
                 handler.end_headers()
-                handler.wfile.write(b'File Not Found')
+                if isinstance(handler.connection, ssl.SSLSocket):
+                    # O TLS cifra em espaço de usuário, então não há como usar sendfile
+                    if st.st_size > _MMAP_THRESHOLD:
+                        # Páginas do mmap são compartilhadas com o page cache e carregadas sob demanda
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                            for offset in range(0, st.st_size, _MMAP_CHUNK_SIZE):
+                                handler.wfile.write(view[offset:offset + _MMAP_CHUNK_SIZE])
+                    else:
+                        shutil.copyfileobj(f, handler.wfile, _WRITE_BUFFER_SIZE)
+                else:
+                    # TCP_CORK junta os cabeçalhos e o início do arquivo nos mesmos segmentos
+                    cork = _TCP_CORK is not None
+                    if cork:
+                        handler.connection.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 1)
+                    try:
+                        # Cópia direta do page cache para o socket (os.sendfile), sem passar pelo Python
+                        handler.wfile.flush()
+                        handler.connection.sendfile(f)
+                    finally:
+                        if cork:
+                            handler.connection.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 0)
         except Exception as e:
             # Tratamento de erro
-            self.logger.error(f"Error serving static file {file_path}: {e}")
+            self.logger.error("Error serving static file %s: %s", file_path, e)
+            if response_started:
+                # Um segundo status no meio da resposta dessincronizaria o cliente da conexão keep-alive
+                handler.close_connection = True
+                return
             handler.send_response(500)
+            handler.send_header('Content-Length', '0')
             handler.end_headers()
 
 
     def _make_http_handler(self):
         class HTTPRequestHandler(http.server.BaseHTTPRequestHandler):
+            # Saída bufferizada: status, cabeçalhos e corpos pequenos saem juntos no flush ao fim da requisição
+            wbufsize = _WRITE_BUFFER_SIZE
+            # Respostas pequenas não ficam retidas pelo algoritmo de Nagle
+            disable_nagle_algorithm = True
+            # HTTP/1.1 mantém a conexão (e a sessão TLS) aberta entre requisições
+            protocol_version = 'HTTP/1.1'
+
+            def send_response(handler, code, message=None):
+                # Respostas sem corpo dispensam Content-Length para manter a conexão viva
+                handler._has_content_length = code < 200 or code in (204, 304)
+                super().send_response(code, message)
+
+            def send_header(handler, keyword, value):
+                if keyword.lower() == 'content-length':
+                    handler._has_content_length = True
+                super().send_header(keyword, value)
+
+            def end_headers(handler):
+                # Sem Content-Length o cliente só sabe onde o corpo termina quando a conexão fecha
+                if not getattr(handler, '_has_content_length', True):
+                    handler.send_header('Connection', 'close')
+                super().end_headers()
+
+            def finish(handler):
+                try:
+                    super().finish()
+                finally:
+                    # A thread da conexão termina aqui: o loop dos handlers assíncronos vai junto
+                    self._close_loop()
+
             def do_GET(handler):
-                if self.http_server_methods['GET']:
-                    if self.is_static_file(handler.path):
-                        self.serve_static_file(handler, handler.path)
-                        return
-                    params = self.parse_path(handler)
-                    result = self.find_functions_to_run('GET', params[0])
-                    for function in result:
-                        vars = self.extract_params_from_patern_in_url(params[0], function['path'])
-                        params.append(vars)
-                        function['function'](handler, params=params)
-                        params.pop()
-                else:
-                    handler.send_response(404)
-                    handler.send_header('Content-type', 'text/html')
-                    handler.end_headers()
-                    handler.wfile.write(b'Method Not Allowed')
+                self._handle_method(handler, 'GET')
 
             def do_POST(handler):
-                params = self.parse_path(handler)
-                if self.http_server_methods['POST']:
-                    params = self.parse_path(handler)
-                    result = self.find_functions_to_run('POST', params[0])
-                    for function in result:
-                        vars = self.extract_params_from_patern_in_url(params[0], function['path'])
-                        params.append(vars)
-                        function['function'](handler, params=params)
-                        params.pop()
-                else:
-                    handler.send_response(404)
-                    handler.send_header("Content-type", "text/html")
-                    handler.end_headers()
-                    handler.wfile.write(b"Method Not Allowed")
+                self._handle_method(handler, 'POST')
 
             def do_PATCH(handler):
-                params = self.parse_path(handler)
-                if self.http_server_methods['PATCH']:
-                    params = self.parse_path(handler)
-                    result = self.find_functions_to_run('PATCH', params[0])
-                    for function in result:
-                        vars = self.extract_params_from_patern_in_url(params[0], function['path'])
-                        params.append(vars)
-                        function['function'](handler, params=params)
-                        params.pop()
-                else:
-                    handler.send_response(404)
-                    handler.send_header("Content-type", "text/html")
-                    handler.end_headers()
-                    handler.wfile.write(b"Method Not Allowed")
+                self._handle_method(handler, 'PATCH')
 
             def do_PUT(handler):
-                params = self.parse_path(handler)
-                if self.http_server_methods['PUT']:
-                    params = self.parse_path(handler)
-                    result = self.find_functions_to_run('PUT', params[0])
-                    for function in result:
-                        vars = self.extract_params_from_patern_in_url(params[0], function['path'])
-                        params.append(vars)
-                        function['function'](handler, params=params)
-                        params.pop()
-                else:
-                    handler.send_response(404)
-                    handler.send_header("Content-type", "text/html")
-                    handler.end_headers()
-                    handler.wfile.write(b"Method Not Allowed")
+                self._handle_method(handler, 'PUT')
 
             def do_DELETE(handler):
-                params = self.parse_path(handler)
-                if self.http_server_methods['DELETE']:
-                    params = self.parse_path(handler)
-                    result = self.find_functions_to_run('DELETE', params[0])
-                    for function in result:
-                        vars = self.extract_params_from_patern_in_url(params[0], function['path'])
-                        params.append(vars)
-                        function['function'](handler, params=params)
-                        params.pop()
-                else:
-                    handler.send_response(404)
-                    handler.send_header("Content-type", "text/html")
-                    handler.end_headers()
-                    handler.wfile.write(b"Method Not Allowed")
+                self._handle_method(handler, 'DELETE')
 
             def log_message(handler, format: str, *args):
-                self.logger.info(f"Request: {handler.client_address} - {format % args}")
+                if self.logger.isEnabledFor(logging.INFO):
+                    self.logger.info("Request: %s - %s", handler.client_address, format % args)
 
         return HTTPRequestHandler
 
@@ -259,13 +702,18 @@ class HttpServerProtocol:
             raise ValueError(f"Method {method} is not supported.")
 
         def decorator(func):
-            self.http_server_methods[method].append({"path": url, "function": func})
+            route = Route(method, url, func)
+            self._route_trees[method].insert(route.segments, route)
+            if not any(_PARAM_SEGMENT.fullmatch(segment) for segment in route.segments):
+                # Rotas estáticas são resolvidas por uma única consulta ao dicionário
+                self._exact_routes[method].setdefault(route.segments, route)
+            self.http_server_methods[method].append(route)
             return func
 
         return decorator
 
     async def async_executor(self, call: Callable[..., Any], *args):
+        if self._closed:
+            raise RuntimeError("Servidor encerrado")
         loop = asyncio.get_running_loop()
-        with ThreadPoolExecutor() as executor:
-            res = await loop.run_in_executor(executor, call, *args)
-        return res
+        return await loop.run_in_executor(self._executor, call, *args)
@@ -3,6 +3,22 @@ import struct
 import base64
 import socket
 
+from Protocols.protocols.websocket.mask import apply_mask
+
+# A requisição de upgrade não muda entre conexões: é montada e codificada uma única vez
+_HANDSHAKE_REQUEST = (
+    "GET / HTTP/1.1\r\n"
+    "Host: localhost:8080\r\n"
+    "Upgrade: websocket\r\n"
+    "Connection: Upgrade\r\n"
+    f"Sec-WebSocket-Key: {base64.b64encode(b'123kg-pasduouo-pasojdpa').decode()}\r\n"
+    "Sec-WebSocket-Version: 13\r\n\r\n"
+).encode('ascii')
+
+# Cabeçalhos prontos (FIN + opcode texto, bit de máscara) para payloads de até 125 bytes
+_SMALL_MASKED_HEADERS = tuple(bytes((0x81, 0x80 | length)) for length in range(126))
+
+
 class WebSocketClient:
 
     def __init__(self) -> None:
@@ -28,56 +44,38 @@ class WebSocketClient:
             payload_length = struct.unpack(">Q", message[offset:offset + 8])[0]
             offset += 8
 
-        return message[offset:offset + payload_length].decode('cp850')
+        # Fatia de memoryview: o payload é decodificado sem uma cópia intermediária
+        return str(memoryview(message)[offset:offset + payload_length], 'utf-8')
 
 
-    def encode_message_with_mask(self, message_bytes: bytes) -> bytearray:
+    def encode_message_with_mask(self, message_bytes: bytes) -> bytes | bytearray:
         # Gerar uma máscara de 4 bytes
         mask = os.urandom(4)  # Gera 4 bytes aleatórios
-        
-        # Construir o frame do WebSocket
-        frame = bytearray()
-        
-        # Primeiro byte: FIN e opcode (0x1 para texto)
-        frame.append(0x81)  # 10000001 (FIN = 1, opcode = 0x1)
-
-        # Segundo byte: máscara habilitada (bit mais significativo = 1) e comprimento do payload
+
         payload_length = len(message_bytes)
-        
         if payload_length <= 125:
-            frame.append(0x80 | payload_length)  # Ativando o bit de máscara (0x80)
-        elif payload_length >= 126 and payload_length <= 65535:
-            frame.append(0x80 | 126)
-            frame.extend(struct.pack('>H', payload_length))  # 2 bytes para comprimento
+            # Caso mais comum: cabeçalho de 2 bytes já pronto na tabela, seguido da máscara e do payload
+            return _SMALL_MASKED_HEADERS[payload_length] + mask + apply_mask(message_bytes, mask)
+
+        # Frame alocado uma única vez com o tamanho final; o cabeçalho é escrito com struct.pack_into:
+        # FIN + opcode texto (0x81), bit de máscara (0x80), comprimento do payload (estendido em 2 ou 8 bytes)
+        # e a máscara
+        if payload_length <= 65535:
+            header_length = 8
+            frame = bytearray(header_length + payload_length)
+            struct.pack_into('!BBH4s', frame, 0, 0x81, 0x80 | 126, payload_length, mask)
         else:
-            frame.append(0x80 | 127)
-            frame.extend(struct.pack('>Q', payload_length))  # 8 bytes para comprimento
-
-        # Adicionar a máscara ao frame
-        frame.extend(mask)
-        
-        # Aplicar a máscara ao payload
-        masked_message = bytearray()
-        for i in range(payload_length):
-            masked_message.append(message_bytes[i] ^ mask[i % 4])
-
-        # Adicionar o payload mascarado ao frame
-        frame.extend(masked_message)
-        
+            header_length = 14
+            frame = bytearray(header_length + payload_length)
+            struct.pack_into('!BBQ4s', frame, 0, 0x81, 0x80 | 127, payload_length, mask)
+
+        # Aplicar a máscara e copiar o payload direto para a sua posição no frame
+        frame[header_length:] = apply_mask(message_bytes, mask)
         return frame
 
     def handshake(self, client: socket.socket):
         # Envia a requisição HTTP para fazer o upgrade para WebSocket
-        key = base64.b64encode(b"123kg-pasduouo-pasojdpa").decode()
-        handshake = (
-            "GET / HTTP/1.1\r\n"
-            "Host: localhost:8080\r\n"
-            "Upgrade: websocket\r\n"
-            "Connection: Upgrade\r\n"
-            f"Sec-WebSocket-Key: {key}\r\n"
-            "Sec-WebSocket-Version: 13\r\n\r\n"
-        )
-        client.send(handshake.encode())
+        client.send(_HANDSHAKE_REQUEST)
 
         # Recebe e imprime a resposta do handshake do servidor
         response = client.recv(1024).decode()
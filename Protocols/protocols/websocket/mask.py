@@ -0,0 +1,35 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional; sem ele o XOR é feito com inteiros grandes
+    np = None
+
+# Abaixo deste tamanho o custo de criar os arrays do NumPy supera o ganho
+_NUMPY_THRESHOLD = 4 * 1024
+
+
+def _apply_mask_numpy(data: bytes, mask: bytes) -> bytes:
+    """
+    XOR em blocos de 8 bytes (uint64), que o NumPy executa com instruções SIMD.
+    """
+    length = len(data)
+    # Copia o payload (bytes ou memoryview) para um buffer múltiplo de 8 bytes; o excedente é descartado no final
+    buffer = np.zeros((length + 7) // 8 * 8, dtype=np.uint8)
+    buffer[:length] = np.frombuffer(data, dtype=np.uint8)
+    words = buffer.view(np.uint64)
+    words ^= np.frombuffer(mask * 2, dtype=np.uint64)[0]
+    return buffer[:length].tobytes()
+
+
+def apply_mask(data: bytes, mask: bytes) -> bytes:
+    """
+    Aplica (ou remove) a máscara de 4 bytes do WebSocket de uma só vez, sem laço byte a byte.
+    """
+    length = len(data)
+    if not length:
+        return b''
+    if np is not None and length >= _NUMPY_THRESHOLD:
+        return _apply_mask_numpy(data, mask)
+    # Repete a máscara até o tamanho do payload e faz o XOR como dois inteiros grandes, em C
+    full_mask = (mask * ((length + 3) // 4))[:length]
+    masked = int.from_bytes(data, 'little') ^ int.from_bytes(full_mask, 'little')
+    return masked.to_bytes(length, 'little')
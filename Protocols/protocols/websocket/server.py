@@ -1,35 +1,50 @@
 import socket
-import base64
-import hashlib
 import struct
+from base64 import b64encode
+from hashlib import sha1
+
+from Protocols.protocols.websocket.mask import apply_mask
+
+# GUID fixo da RFC 6455, concatenado à chave do cliente para gerar o Sec-WebSocket-Accept
+_WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_KEY_HEADER = b"Sec-WebSocket-Key:"
+
+# Parte fixa da resposta de handshake; apenas o Sec-WebSocket-Accept varia por conexão
+_HANDSHAKE_RESPONSE_PREFIX = (
+    b"HTTP/1.1 101 Switching Protocols\r\n"
+    b"Upgrade: websocket\r\n"
+    b"Connection: Upgrade\r\n"
+    b"Sec-WebSocket-Accept: "
+)
+
+# Cabeçalhos prontos (FIN + opcode texto, sem máscara) para payloads de até 125 bytes
+_SMALL_HEADERS = tuple(bytes((0x81, length)) for length in range(126))
+
 
 class WebSocketServer:
 
     def __init__(self) -> None:
         pass
 
-    def encode_message(self, message_bytes: bytes):        
-        # Construir o frame do WebSocket
-        frame = bytearray()
-        
-        # Primeiro byte: FIN e opcode (0x1 para texto)
-        frame.append(0x81)  # 10000001 (FIN = 1, opcode = 0x1)
-
-        # Segundo byte: sem máscara (bit 0) e comprimento do payload
+    def encode_message(self, message_bytes: bytes) -> bytes | bytearray:
         payload_length = len(message_bytes)
-        
         if payload_length <= 125:
-            frame.append(payload_length)
-        elif payload_length >= 126 and payload_length <= 65535:
-            frame.append(126)
-            frame.extend(struct.pack('>H', payload_length))  # 2 bytes para comprimento
+            # Caso mais comum: cabeçalho de 2 bytes já pronto na tabela, uma única concatenação
+            return _SMALL_HEADERS[payload_length] + message_bytes
+
+        # Servidor não mascara: FIN + opcode texto (0x81) e comprimento estendido em 2 ou 8 bytes, escritos
+        # com struct.pack_into no frame já alocado com o tamanho final
+        if payload_length <= 65535:
+            header_length = 4
+            frame = bytearray(header_length + payload_length)
+            struct.pack_into('!BBH', frame, 0, 0x81, 126, payload_length)
         else:
-            frame.append(127)
-            frame.extend(struct.pack('>Q', payload_length))  # 8 bytes para comprimento
+            header_length = 10
+            frame = bytearray(header_length + payload_length)
+            struct.pack_into('!BBQ', frame, 0, 0x81, 127, payload_length)
 
-        # Adicionando o payload (dados)
-        frame.extend(message_bytes)
-        
+        # Adicionando o payload (dados) com uma única cópia
+        frame[header_length:] = message_bytes
         return frame
 
     def decode_message(self, message: bytes):
@@ -53,43 +68,40 @@ class WebSocketServer:
             payload_length = struct.unpack(">Q", message[offset:offset + 8])[0]
             offset += 8
 
+        # Fatias de memoryview não copiam o payload; a única cópia é a do desmascaramento/decodificação
+        view = memoryview(message)
+
         # Se a mensagem estiver mascarada, devemos ler a máscara de 4 bytes
         if masked:
-            mask = message[offset:offset + 4]
+            mask = bytes(view[offset:offset + 4])
             offset += 4
 
             # Desmascarar os dados
-            decoded_bytes = bytearray()
-            for i in range(payload_length):
-                decoded_bytes.append(message[offset + i] ^ mask[i % 4])
+            decoded_bytes = apply_mask(view[offset:offset + payload_length], mask)
 
-            return decoded_bytes.decode('cp850')
+            return decoded_bytes.decode('utf-8')
         else:
             # Se não estiver mascarada, retornar diretamente os dados
-            return message[offset:offset + payload_length].decode('cp850')
+            return str(view[offset:offset + payload_length], 'utf-8')
     
     def handshake(self, client_socket: socket.socket):
-        request = client_socket.recv(1024).decode()
-        print(f"Recebido: {request}")
-
-        # Extraindo a chave do WebSocket do cabeçalho
-        key = None
-        for line in request.split("\r\n"):
-            if "Sec-WebSocket-Key" in line:
-                key = line.split(": ")[1]
+        request = client_socket.recv(1024)
+
+        # Extraindo a chave do WebSocket do cabeçalho com uma única busca nos bytes, sem decodificar a requisição
+        start = request.find(_KEY_HEADER)
+        if start < 0:
+            # Nomes de cabeçalho não diferenciam maiúsculas de minúsculas
+            start = request.lower().find(_KEY_HEADER.lower())
+        if start < 0:
+            raise ValueError("Sec-WebSocket-Key ausente na requisição de handshake")
+        start += len(_KEY_HEADER)
+        end = request.find(b"\r\n", start)
+        key = request[start:end if end >= 0 else len(request)].strip()
 
         # Respondendo com o handshake do WebSocket
-        accept_key = base64.b64encode(
-            hashlib.sha1((key + "258EAFA5-E914-47DA-95CA-C5AB0DC85B11").encode()).digest()
-        ).decode()
-
-        handshake = (
-            "HTTP/1.1 101 Switching Protocols\r\n"
-            "Upgrade: websocket\r\n"
-            "Connection: Upgrade\r\n"
-            f"Sec-WebSocket-Accept: {accept_key}\r\n\r\n"
-        )
-        client_socket.send(handshake.encode())
+        digest = sha1(key)
+        digest.update(_WEBSOCKET_GUID)
+        client_socket.send(_HANDSHAKE_RESPONSE_PREFIX + b64encode(digest.digest()) + b"\r\n\r\n")
 
         # A partir deste ponto, a conexão WebSocket está estabelecida
 
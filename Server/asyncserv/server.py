@@ -1,16 +1,29 @@
 import asyncio
+import os
+import socket
 import ssl
-import struct
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from Abstracts.Auth import Auth
 from Events import Events
 from Files import File
+from Framing import LENGTH, read_exactly, write_framed
 from Options import Client_ops, SSLContextOps, Server_ops
 from Crypt import Crypt
 from Client import AsyncClient
 from TaskManager import AsyncTaskManager
 from Protocols.configure import config
 
+# Tamanho da fila de conexões pendentes no listen (o padrão do asyncio é 100)
+_LISTEN_BACKLOG = 1024
+
+# Máximo de mensagens aguardando o disparo dos eventos
+_EVENTS_QUEUE_SIZE = 1024
+
+# Limites do buffer de escrita de cada conexão (backpressure do drain)
+_WRITE_BUFFER_HIGH = 1 << 20
+_WRITE_BUFFER_LOW = 1 << 18
+
 
 class Server:
     def __init__(self, Options: Server_ops) -> None:
@@ -25,7 +38,7 @@ class Server:
         self.taskManager = AsyncTaskManager()
         self.configureProtocol = config
         self.configureConnection = {}
-        self.__clients: list[AsyncClient] = []
+        self.__clients: dict[str, AsyncClient] = {}
         self.__running: bool = True
         self.crypt: Crypt | None = None
         self.ssl_context: ssl.SSLContext | None = None
@@ -39,6 +52,24 @@ class Server:
             self.crypt = Crypt()
             self.crypt.configure(Options.encrypt_configs)
 
+        # Pool só para cifrar/decifrar: a criptografia não disputa threads com arquivos e compressão
+        self.__crypto_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='crypto')
+
+        # Mensagens recebidas seguem para um único worker que dispara os eventos, fora do caminho da leitura
+        self.__events_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=_EVENTS_QUEUE_SIZE)
+        self.__events_worker = self.loop.create_task(self.__dispatch_events())
+
+    async def __dispatch_events(self) -> None:
+        while True:
+            message = await self.__events_queue.get()
+            try:
+                await self.events.async_executor(self.events.scam, message)
+            except Exception as e:
+                print(e)
+
+    async def __run_crypto(self, Call, *args):
+        return await self.loop.run_in_executor(self.__crypto_executor, Call, *args)
+
     def ssl_configure(self, ssl_ops: SSLContextOps):
         self.ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
         self.ssl_context.check_hostname = ssl_ops.check_hostname
@@ -46,8 +77,14 @@ class Server:
 
     async def send_file(self, writer: asyncio.StreamWriter, file: File, bytes_block_length: int = 2048) -> None:
         await file.async_executor(file.compress_file)
-        await self.send_message(b"".join([chunk for chunk in await file.async_executor(file.read, bytes_block_length)]),
-                                bytes_block_length, writer)
+        if self.crypt is None and self.encoder is None:
+            # Sem criptografia nem encoder o payload segue como está: o buffer do BytesIO vai ao transporte
+            # junto com o cabeçalho, sem o read() que copiaria o arquivo comprimido inteiro
+            with file.file.getbuffer() as body:
+                await write_framed(writer, LENGTH.pack(len(body)), body)
+            return
+        # Após compress_file o conteúdo já está inteiro em um BytesIO: lido de uma vez, sem join de pedaços
+        await self.send_message(file.file.read(), bytes_block_length, writer)
 
     async def receive_file(self, reader: asyncio.StreamReader, bytes_block_length: int = 2048) -> File:
         file = File()
@@ -57,12 +94,16 @@ class Server:
         return file
 
     async def send_message_all_clients(self, message: bytes, sent_bytes: int = 2048):
-        for client in self.__clients:
-            await self.send_message(message, sent_bytes, client.writer)
+        # Cifra e codifica uma única vez; os envios para os clientes correm em paralelo
+        header, message = await self.__prepare_message(message)
+        await asyncio.gather(*(write_framed(client.writer, header, message) for client in list(self.__clients.values())))
 
     async def send_message(self, message: bytes, sent_bytes: int = 2048, writer: asyncio.StreamWriter = None, block: bool = False):
+        await write_framed(writer, *await self.__prepare_message(message))
+
+    async def __prepare_message(self, message: bytes) -> tuple[bytes, bytes]:
         try:
-            message = await self.crypt.sync_crypt.async_executor(self.crypt.sync_crypt.encrypt_message, message)
+            message = await self.__run_crypto(self.crypt.sync_crypt.encrypt_message, message)
         except Exception as e:
             pass
 
@@ -71,94 +112,46 @@ class Server:
         except Exception as e:
             pass
 
-        lng = len(message)
-        writer.write(await self.encoder(struct.pack("!Q", lng)))
-        await writer.drain()
-
-        if block:
-            writer.write(message)
-            await writer.drain()
-            return
-
-        offset = 0
-        while offset < lng:
-            writer.write(message[offset:offset + sent_bytes])
-            await writer.drain()
-            offset += sent_bytes
-
-    async def __extract_number(self, data):
-        if isinstance(data, (int, float)):
-            return data
-
-        if isinstance(data, (str, bytes)):
-            try:
-                return int(data)
-            except Exception as e:
-                pass
-
-        if isinstance(data, (bytes, bytearray)):
-            try:
-                decoded_value = struct.unpack("!Q", data)[0]
-                return decoded_value
-            except struct.error:
-                pass
+        # Cabeçalho cru, no mesmo formato dos endpoints com threads; o encoder só vale para o corpo
+        return LENGTH.pack(len(message)), message
 
     async def receive_message(self, recv_bytes: int = 2048, reader: asyncio.StreamReader = None, block: bool = False):
-        length = await self.__extract_number(await self.decoder(await reader.read(8)))
+        raw_length = await read_exactly(reader, LENGTH.size, allow_eof=True)
+        if not raw_length:
+            return b""
+        # O cabeçalho trafega cru, como nos endpoints com threads: o decoder só vale para o corpo
+        (length,) = LENGTH.unpack(raw_length)
+        message = await read_exactly(reader, length)
 
-        if block:
-            message = reader.read(length)
-            try:
-                dec = await self.crypt.sync_crypt.async_executor(self.crypt.sync_crypt.decrypt_message, await self.decoder(message))
-                if await self.events.async_executor(self.events.size) > 0:
-                    await self.events.async_executor(self.events.scam, dec)
-                return dec
-            except Exception as e:
-                print(e)
-                return await self.decoder(message)
-
-        chunks = []
-        bytes_received = 0
-        while bytes_received < length:
-            chunk = await reader.read(recv_bytes)
-            if not chunk:
-                raise RuntimeError('Conexão interrompida')
-            chunks.append(chunk)
-            bytes_received += len(chunk)
-
-        res = b"".join(chunks)
         try:
-            dec = await self.crypt.sync_crypt.async_executor(self.crypt.sync_crypt.decrypt_message, await self.decoder(res))
-            if await self.events.async_executor(self.events.size) > 0:
-                await self.events.async_executor(self.events.scam, dec)
+            dec = await self.__run_crypto(self.crypt.sync_crypt.decrypt_message, await self.decoder(message))
+            if self.events.size() > 0:
+                # Fila cheia: a leitura espera o worker (backpressure) em vez de acumular mensagens sem limite
+                await self.__events_queue.put(dec)
             return dec
         except Exception as e:
-            return await self.decoder(res)
+            return await self.decoder(message)
 
     async def is_running(self) -> bool:
         return self.__running
 
     async def save_clients(self, client: AsyncClient) -> None:
-        if client not in self.__clients:
-            self.__clients.append(client)
+        self.__clients.setdefault(str(client.uuid), client)
 
     async def sync_crypt_key(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         client_public_key = self.decoder(await reader.read(2048))
-        client_public_key_obj = await self.crypt.async_crypt.async_executor(self.crypt.async_crypt.load_public_key,
-                                                                            client_public_key)
-
-        sync_key = await self.crypt.sync_crypt.async_executor(self.crypt.sync_crypt.get_key)
-        enc_key = await self.crypt.async_crypt.async_executor(self.crypt.async_crypt.encrypt_with_public_key, sync_key,
-                                                              client_public_key_obj)
+        # A chave simétrica não depende da chave do cliente: as duas etapas rodam em paralelo
+        client_public_key_obj, sync_key = await asyncio.gather(
+            self.__run_crypto(self.crypt.load_public_key, client_public_key),
+            self.__run_crypto(self.crypt.sync_crypt.get_key))
+        enc_key = await self.__run_crypto(self.crypt.async_crypt.encrypt_with_public_key, sync_key, client_public_key_obj)
         writer.write(self.encoder(enc_key))
         await writer.drain()
 
     async def get_client(self, uuid: str = "") -> AsyncClient:
-        if not uuid and len(self.__clients):
-            return self.__clients.pop()
-        for client in self.__clients:
-            if str(client.uuid) == uuid:
-                return client
+        if not uuid and self.__clients:
+            return self.__clients.popitem()[1]
+        return self.__clients.get(uuid)
 
     async def run(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
         print(f"Cliente conectado")
@@ -167,6 +160,12 @@ class Server:
                                        encrypt_configs=self.server_options.encrypt_configs))
             client.reader = reader
             client.writer = writer
+            # O drain só pausa quando há mais de 1 MiB pendente no transporte (o padrão do asyncio é 64 KiB)
+            writer.transport.set_write_buffer_limits(high=_WRITE_BUFFER_HIGH, low=_WRITE_BUFFER_LOW)
+            sock = writer.get_extra_info('socket')
+            if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+                # O asyncio já liga o TCP_NODELAY, mas não em todas as versões/transportes (TLS): garante aqui
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
             try:
                 if self.auth and not await self.auth.async_executor(self.auth.validate_token, client):
@@ -180,22 +179,29 @@ class Server:
             print(e)
 
     async def break_server(self):
-        for client in self.__clients:
+        for client in self.__clients.values():
             await client.disconnect()
+        self.__events_worker.cancel()
+        self.__crypto_executor.shutdown(wait=False)
         self.__running = False
         sys.exit(0)
 
     async def start(self) -> None:
         try:
             # Criação do servidor
+            # Fila de accept maior para rajadas de reconexão; com reuse_port (opcional) vários processos podem
+            # escutar a mesma porta. O accept só começa depois de tudo pronto (start_serving=False)
+            reuse_port = self.server_options.reuse_port and hasattr(socket, 'SO_REUSEPORT')
             server = await asyncio.start_server(
-                self.run, self.HOST, self.PORT, ssl=self.ssl_context)
+                self.run, self.HOST, self.PORT, ssl=self.ssl_context, backlog=_LISTEN_BACKLOG,
+                reuse_port=reuse_port or None, start_serving=False)
 
             addr = server.sockets[0].getsockname()
             print(f'Server rodando no endereço:{addr}')
 
             self.__running = True
             async with server:
+                await server.start_serving()
                 await server.serve_forever()
         except Exception as e:
             self.__running = False
@@ -1,6 +1,6 @@
+import selectors
 import socket
 import ssl
-import struct
 import threading
 import sys
 from Abstracts.Auth import Auth
@@ -10,9 +10,17 @@ from Crypt import Crypt
 from Client import ThreadClient
 from Connection_type.Types import Types
 from Files import File
+from Framing import LENGTH, open_message, prepare_message, recv_into_exactly, recv_length, send_framed
 from TaskManager import TaskManager
 from Protocols import config
 
+# Fila de conexões pendentes de cada socket de escuta (o padrão do listen() é 128 no Linux)
+_LISTEN_BACKLOG = 1024
+
+# Buffer de leitura reaproveitado por thread: tamanho inicial e maior tamanho mantido entre mensagens
+_READ_BUFFER_SIZE = 64 * 1024
+_READ_BUFFER_LIMIT = 4 * 1024 * 1024
+
 
 class Server(threading.Thread):
     def __init__(self, Options: Server_ops) -> None:
@@ -28,7 +36,12 @@ class Server(threading.Thread):
         self.taskManager = TaskManager()
         self.configureProtocol = config
         self.configureConnection = {}
-        self.__clients: list[ThreadClient] = []
+        # Clientes indexados pelo uuid (str): inclusão e busca em O(1)
+        self.__clients: dict[str, ThreadClient] = {}
+        self.__clients_lock = threading.Lock()
+        self.__read_buffers = threading.local()
+        # Threads dos laços de accept extras (SO_REUSEPORT), aguardadas no encerramento
+        self.__engines: list[threading.Thread] = []
         self.__running: bool = True
         self.crypt: Crypt | None = None
         self.ssl_context: ssl.SSLContext | None = None
@@ -57,6 +70,12 @@ class Server(threading.Thread):
             bytes_block_length (int, optional): block length for read. Defaults to 2048.
         """
         file.compress_file()
+        if self.crypt is None and self.encoder is None:
+            # Sem criptografia nem encoder o payload segue como está: o buffer do BytesIO vai ao socket junto
+            # com o cabeçalho (um sendall/sendmsg), sem join de blocos nem cópia do arquivo comprimido
+            with file.file.getbuffer() as body:
+                send_framed(client, LENGTH.pack(len(body)), body)
+            return
         self.send_message(client, b"".join([chunk for chunk in file.read(bytes_block_length)]), bytes_block_length)
 
     def receive_file(self, client: socket.socket | ssl.SSLSocket, bytes_block_length: int = 2048) -> File:
@@ -76,125 +95,113 @@ class Server(threading.Thread):
         file.decompress_bytes()
         return file
     
-    def __extract_number(self, data):
-        if isinstance(data, (int, float)):
-            return data
-
-        if isinstance(data, (str, bytes)):
-            try:
-                return int(data)
-            except Exception as e:
-                pass
-
-        if isinstance(data, (bytes, bytearray)):
-            try:
-                decoded_value = struct.unpack("!Q", data)[0]
-                return decoded_value
-            except struct.error:
-                pass
-    
-    def receive_message(self, client: socket.socket | ssl.SSLSocket, recv_bytes: int = 2048, block: bool = False) -> bytes:
-        raw_msglen = client.recv(8)
-        if not raw_msglen:
+    def __open_message(self, message: bytes | bytearray) -> bytes | bytearray:
+        return open_message(message, self.crypt, self.decoder, self.events)
+
+    def receive_message(self, client: socket.socket | ssl.SSLSocket, recv_bytes: int = 2048, block: bool = False) -> bytes | bytearray:
+        msglen = recv_length(client)
+        if msglen is None:
             return b""
-        msglen = self.__extract_number(self.decoder(raw_msglen))
 
         if block:
-            message = client.recv(msglen)
-            try:
-                dec_message = self.crypt.sync_crypt.decrypt_message(self.decoder(message))
-                if self.events.size() > 0:
-                    self.events.scam(dec_message)
-                return dec_message
-            except Exception as e:
-                return self.decoder(message)
-
-        chunks = []
-        bytes_received = 0
-        while bytes_received < msglen:
-            chunk = client.recv(recv_bytes)
-            if not chunk:
-                raise RuntimeError('Conexão interrompida')
-            chunks.append(chunk)
-            bytes_received += len(chunk)
-
-        message = b"".join(chunks)
-        try:
-            dec_message = self.crypt.sync_crypt.decrypt_message(self.decoder(message))
-            if self.events.size() > 0:
-                self.events.scam(dec_message)
-            return dec_message
-        except Exception as e:
-            return self.decoder(message)
+            return self.__open_message(client.recv(msglen))
+
+        if msglen > _READ_BUFFER_LIMIT:
+            # Mensagens grandes usam um buffer avulso, entregue adiante sem uma segunda cópia da mensagem
+            buffer = bytearray(msglen)
+            recv_into_exactly(client, memoryview(buffer), recv_bytes)
+            return self.__open_message(buffer)
+
+        # O buffer da thread é reaproveitado pela próxima leitura: a mensagem pequena sai copiada dele
+        view = self.__read_buffer(msglen)
+        recv_into_exactly(client, view, recv_bytes)
+        return self.__open_message(bytes(view))
+
+    def __read_buffer(self, size: int) -> memoryview:
+        # Um buffer por thread de leitura, que só cresce: mensagens de tamanho parecido não realocam nada
+        buffer = getattr(self.__read_buffers, 'buffer', None)
+        if buffer is None or len(buffer) < size:
+            buffer = self.__read_buffers.buffer = bytearray(max(size, _READ_BUFFER_SIZE))
+        return memoryview(buffer)[:size]
 
     def send_message_all_clients(self, message: bytes, sent_bytes: int = 2048):
+        # Cifra e codifica uma única vez; por cliente só muda o envio
+        header, message = prepare_message(message, self.crypt, self.encoder)
         try:
-            for client in self.__clients:
-                self.send_message(client.connection, message, sent_bytes)
+            for client in self.__snapshot_clients():
+                send_framed(client.connection, header, message)
         except Exception as e:
             print(e)
 
     def send_message(self, client: socket.socket | ssl.SSLSocket, message: bytes, sent_bytes: int = 2048, block: bool = False) -> None:
-        try:
-            message = self.crypt.sync_crypt.encrypt_message(message)
-        except Exception as e:
-            pass
-
-        try:
-            message = self.encoder(message.decode("cp850"))
-        except Exception as e:
-            pass
-        
-        msglen = len(message)
-        client.sendall(self.encoder(struct.pack("!Q", msglen).decode("cp850")))
-
-        if block:
-            client.sendall(message)
-            return
-
-        offset = 0
-        while offset < msglen:
-            sent = client.send(message[offset:offset + sent_bytes])
-            if not sent:
-                raise RuntimeError('Conexão interrompida')
-            offset += sent
+        send_framed(client, *prepare_message(message, self.crypt, self.encoder))
 
     def is_running(self) -> bool:
         return self.__running
 
     def save_clients(self, client: ThreadClient) -> None:
-        if client not in self.__clients:
-            self.__clients.append(client)
+        # Vários laços de accept podem salvar clientes ao mesmo tempo
+        with self.__clients_lock:
+            if not self.__running:
+                # O servidor foi encerrado enquanto a conexão era aceita: ninguém mais vai desconectá-la
+                client.disconnect()
+                return
+            self.__clients.setdefault(str(client.uuid), client)
+
+    def __snapshot_clients(self) -> list[ThreadClient]:
+        # Os laços de accept inserem no dicionário em paralelo: percorre uma cópia tirada sob o lock
+        with self.__clients_lock:
+            return list(self.__clients.values())
 
     def sync_crypt_key(self, client: socket.socket | ssl.SSLSocket):
-        client_public_key = self.decoder(client.recv(2048))
-        client_public_key_obj = self.crypt.async_crypt.load_public_key(client_public_key)
+        client_public_key = client.recv(2048)
+        if self.decoder is not None:
+            client_public_key = self.decoder(client_public_key)
+        client_public_key_obj = self.crypt.load_public_key(client_public_key)
         enc_key = self.crypt.async_crypt.encrypt_with_public_key(self.crypt.sync_crypt.get_key(), client_public_key_obj)
-        client.sendall(self.encoder(enc_key))
+        if self.encoder is not None:
+            enc_key = self.encoder(enc_key)
+        client.sendall(enc_key)
 
     def break_server(self):
-        for client in self.__clients:
+        with self.__clients_lock:
+            # A partir daqui os laços de accept não salvam mais clientes
+            self.__running = False
+        for engine in self.__engines:
+            if engine is not threading.current_thread():
+                engine.join()
+        for client in self.__snapshot_clients():
             client.disconnect()
-        self.__running = False
         sys.exit(0)
     
     def get_client(self, uuid: str = "") -> ThreadClient:
-        if not uuid and len(self.__clients):
-            return self.__clients.pop()
-        for client in self.__clients:
-            if str(client.uuid) == uuid:
-                return client
+        with self.__clients_lock:
+            if uuid or not self.__clients:
+                return self.__clients.get(uuid)
+            return self.__clients.popitem()[1]
+
+    def __listen_socket(self, reuse_port: bool) -> socket.socket:
+        server = socket.socket(*self.conn_type)
+        if reuse_port:
+            # Vários sockets na mesma porta: o kernel distribui as conexões novas entre eles
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server.bind((self.HOST, self.PORT))
+        server.listen(_LISTEN_BACKLOG)
+        return server
+
+    def __accept_loop(self, server: socket.socket) -> None:
+        # O accept só é chamado quando há conexão pendente; o timeout permite perceber a parada do servidor
+        with server, selectors.DefaultSelector() as accept_selector:
+            accept_selector.register(server, selectors.EVENT_READ)
 
-    def run(self) -> None:
-        with socket.socket(*self.conn_type) as server:
-
-            server.bind((self.HOST, self.PORT))
-            server.listen()
-
-            print("Servidor rodando")
             while self.__running:
                 try:
+                    if not accept_selector.select(timeout=0.5):
+                        continue
                     (client, address) = server.accept()
+                    if client.type == socket.SOCK_STREAM and client.family in (socket.AF_INET, socket.AF_INET6):
+                        # Mensagens pequenas (RPC) não ficam retidas pelo algoritmo de Nagle
+                        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
                     try:
                         client = self.ssl_context.wrap_socket(client, server_side=True)
@@ -214,10 +221,24 @@ class Server(threading.Thread):
                         pass
 
                     self.save_clients(cliente)
-                except KeyboardInterrupt:
-                    sys.exit(1)
                 except Exception as e:
-                    sys.exit(1)
+                    # sys.exit aqui encerraria só esta thread, sem aviso: registra o erro e sai do laço
+                    print(e)
+                    break
+
+    def run(self) -> None:
+        # Um laço de accept por socket ("socket engines") quando SO_REUSEPORT é pedido e existe na plataforma
+        reuse_port = (self.server_options.reuse_port and hasattr(socket, 'SO_REUSEPORT')
+                      and self.conn_type[1] == socket.SOCK_STREAM)
+        engines = max(1, self.server_options.engines) if reuse_port else 1
+        servers = [self.__listen_socket(reuse_port) for _ in range(engines)]
+
+        print("Servidor rodando")
+        for server in servers[1:]:
+            engine = threading.Thread(target=self.__accept_loop, args=(server,), name='accept-engine', daemon=True)
+            self.__engines.append(engine)
+            engine.start()
+        self.__accept_loop(servers[0])
 
 
 if __name__ == '__main__':
@@ -7,4 +7,7 @@ setup(
     install_requires=[
         "cryptography"
     ],
+    extras_require={
+        "speedups": ["numpy", "isal", "rapidgzip"]
+    },
 )
@@ -0,0 +1,58 @@
+import os, sys
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+project_dir = os.path.abspath(os.path.join(current_dir, '..'))
+
+sys.path.append(project_dir)
+
+import gzip
+import importlib
+import pytest
+from Files import File
+
+# Files/__init__ reexporta a classe com o mesmo nome do módulo
+file_module = importlib.import_module("Files.File")
+
+
+def round_trip(data: bytes) -> bytes:
+    file = File()
+    file.setBytes(data)
+    file.compress_file()
+    compressed = file.file.getvalue()
+    # O resultado é gzip padrão, legível por qualquer implementação
+    assert gzip.decompress(compressed) == data
+    file.decompress_bytes()
+    return file.file.read()
+
+
+@pytest.mark.parametrize("size", [0, 1, file_module.READ_BUFFER_SIZE - 1, file_module.READ_BUFFER_SIZE + 1, 1024 * 1024])
+def test_compress_round_trip(size):
+    data = os.urandom(size // 2) + b"a" * (size - size // 2)
+    assert round_trip(data) == data
+
+
+def test_compress_from_disk(tmp_path):
+    path = tmp_path / "data.bin"
+    data = b"linha de texto\n" * 50000
+    path.write_bytes(data)
+    file = File(str(path), "rb")
+    file.open()
+    file.compress_file()
+    file.decompress_bytes()
+    assert file.file.read() == data
+
+
+@pytest.mark.skipif(file_module.rapidgzip is None, reason="rapidgzip não instalado")
+def test_parallel_decompress_round_trip(monkeypatch):
+    # Dados aleatórios não comprimem: o gzip fica acima do limite e usa o rapidgzip
+    data = os.urandom(12 * 1024 * 1024)
+    calls = []
+    real_open = file_module.rapidgzip.open
+
+    def spy_open(*args, **kwargs):
+        calls.append(args)
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(file_module.rapidgzip, "open", spy_open)
+    assert round_trip(data) == data
+    assert len(calls) == 1
@@ -0,0 +1,82 @@
+import os, sys
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+project_dir = os.path.abspath(os.path.join(current_dir, '..'))
+
+sys.path.append(project_dir)
+
+import asyncio
+import base64
+import socket
+import threading
+import pytest
+from Client.asyncli.client import Client as AsyncClient
+from Client.threadcli.client import Client as ThreadClient
+from Framing import LENGTH, prepare_message, recv_length
+from Options import Client_ops
+
+
+def test_recv_length_waits_for_split_header():
+    a, b = socket.socketpair()
+    with a, b:
+        header = LENGTH.pack(123456789)
+        a.sendall(header[:3])
+        # O restante do cabeçalho chega depois do primeiro recv
+        timer = threading.Timer(0.1, a.sendall, args=(header[3:],))
+        timer.start()
+        assert recv_length(b) == 123456789
+        timer.join()
+
+
+def test_recv_length_clean_eof():
+    a, b = socket.socketpair()
+    with b:
+        a.close()
+        assert recv_length(b) is None
+
+
+def test_recv_length_truncated_header():
+    a, b = socket.socketpair()
+    with b:
+        a.sendall(b"\x00\x01")
+        a.close()
+        with pytest.raises(RuntimeError):
+            recv_length(b)
+
+
+async def async_b64encode(data: bytes) -> bytes:
+    return base64.b64encode(data)
+
+
+async def async_b64decode(data: bytes) -> bytes:
+    return base64.b64decode(data)
+
+
+def test_async_and_thread_endpoints_share_wire_format():
+    # Com encoder configurado, o cabeçalho continua cru nas duas famílias de endpoints
+    async def exchange(a: socket.socket, b: socket.socket) -> bytes:
+        client = AsyncClient(Client_ops(encoder=async_b64encode, decoder=async_b64decode))
+        client.reader, client.writer = await asyncio.open_connection(sock=a)
+        await client.send_message(b"mensagem")
+        received = b""
+        while len(received) < LENGTH.size + 12:
+            received += await asyncio.get_running_loop().sock_recv(b, 65536)
+        b.sendall(received)
+        echoed = await client.receive_message()
+        client.writer.close()
+        return received, echoed
+
+    a, b = socket.socketpair()
+    with a, b:
+        b.setblocking(False)
+        received, echoed = asyncio.run(exchange(a, b))
+    header, body = prepare_message(b"mensagem", None, base64.b64encode)
+    assert received == header + body
+    assert echoed == b"mensagem"
+
+    thread_client = ThreadClient(Client_ops(decoder=base64.b64decode))
+    a, b = socket.socketpair()
+    with a, b:
+        thread_client.connection = a
+        b.sendall(received)
+        assert thread_client.receive_message() == b"mensagem"
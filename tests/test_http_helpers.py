@@ -0,0 +1,125 @@
+import os, sys
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+project_dir = os.path.abspath(os.path.join(current_dir, '..'))
+
+sys.path.append(project_dir)
+
+import asyncio
+import gc
+import logging
+import weakref
+import pytest
+from email.utils import formatdate
+from Protocols.protocols.httpServerProtocol import HttpServerProtocol, Route, _RouteNode
+
+
+def build_tree(*paths: str) -> _RouteNode:
+    root = _RouteNode()
+    for path in paths:
+        route = Route("GET", path, lambda handler, params: None)
+        root.insert(route.segments, route)
+    return root
+
+
+def match(root: _RouteNode, path: str):
+    result = root.match(tuple(filter(None, path.split("/"))))
+    if result is None:
+        return None
+    routes, parsed_vars = result
+    return routes[0].path, parsed_vars
+
+
+def test_literal_segment_has_priority_over_parameter():
+    root = build_tree("/users/{int: id}", "/users/me")
+    assert match(root, "/users/me") == ("/users/me", {})
+    assert match(root, "/users/42") == ("/users/{int: id}", {"id": 42})
+
+
+def test_negative_int_parameter():
+    root = build_tree("/items/{int: id}")
+    assert match(root, "/items/-7") == ("/items/{int: id}", {"id": -7})
+    assert match(root, "/items/7a") is None
+
+
+def test_backtracks_from_literal_to_parameter():
+    # O ramo literal "me" não tem "/posts": a busca volta e tenta o parâmetro
+    root = build_tree("/users/me/profile", "/users/{str: name}/posts")
+    assert match(root, "/users/me/posts") == ("/users/{str: name}/posts", {"name": "me"})
+    assert match(root, "/users/me/profile") == ("/users/me/profile", {})
+
+
+def test_backtracking_discards_vars_of_failed_branch():
+    root = build_tree("/a/{int: n}/x", "/a/{str: s}/y")
+    assert match(root, "/a/1/y") == ("/a/{str: s}/y", {"s": "1"})
+
+
+def test_unknown_parameter_type():
+    with pytest.raises(ValueError):
+        build_tree("/a/{uuid: id}")
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, set()),
+    ("", set()),
+    ("gzip, br", {"gzip", "br"}),
+    ("GZIP;q=0.5, br;q=0", {"gzip"}),
+    ("br; q=0.000, identity", {"identity"}),
+])
+def test_accepted_encodings(header, expected):
+    assert HttpServerProtocol._accepted_encodings(header) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("*", True),
+    ('"abc"', True),
+    ('"x", "abc"', True),
+    ('"abcd"', False),
+])
+def test_etag_matches(header, expected):
+    assert HttpServerProtocol._etag_matches(header, '"abc"') is expected
+
+
+def test_not_modified_since():
+    mtime = 1_700_000_000.75
+    assert HttpServerProtocol._not_modified_since(formatdate(mtime, usegmt=True), mtime)
+    assert HttpServerProtocol._not_modified_since(formatdate(mtime + 60, usegmt=True), mtime)
+    assert not HttpServerProtocol._not_modified_since(formatdate(mtime - 60, usegmt=True), mtime)
+    assert not HttpServerProtocol._not_modified_since(None, mtime)
+    assert not HttpServerProtocol._not_modified_since("data inválida", mtime)
+    # Sem fuso horário a data é ignorada
+    assert not HttpServerProtocol._not_modified_since("Tue, 14 Nov 2023 22:13:20", mtime)
+
+
+
+
+def test_close_shuts_down_executor_and_loops(tmp_path):
+    server = HttpServerProtocol(logging_path=str(tmp_path / "server.log"), static_dir=str(tmp_path))
+    server.close()
+    with pytest.raises(RuntimeError):
+        server._executor.submit(print)
+    with pytest.raises(RuntimeError):
+        server._get_loop()
+    with pytest.raises(RuntimeError):
+        asyncio.run(server.async_executor(print))
+    # Chamadas repetidas (ex.: na saída do interpretador depois de um close explícito) não falham
+    server.close()
+
+
+def test_unreferenced_server_is_released(tmp_path):
+    server = HttpServerProtocol(logging_path=str(tmp_path / "server.log"), static_dir=str(tmp_path))
+    ref = weakref.ref(server)
+    del server
+    gc.collect()
+    assert ref() is None
+
+
+def test_each_log_path_gets_its_own_logger(tmp_path):
+    first = HttpServerProtocol(logging_path=str(tmp_path / "first.log"), static_dir=str(tmp_path))
+    second = HttpServerProtocol(logging_path=str(tmp_path / "second.log"), static_dir=str(tmp_path))
+    shared = HttpServerProtocol(logging_path=str(tmp_path / "first.log"), static_dir=str(tmp_path))
+    assert first.logger is not second.logger and first.logger is shared.logger
+    assert len(first.logger.handlers) == 1
+    # O nível é ajustado só no logger da instância, não no do módulo
+    assert logging.getLogger(HttpServerProtocol.__module__).level == logging.NOTSET
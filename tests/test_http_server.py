@@ -0,0 +1,166 @@
+import os, sys
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+project_dir = os.path.abspath(os.path.join(current_dir, '..'))
+
+sys.path.append(project_dir)
+
+import gzip
+import http.client
+import socket
+import threading
+import pytest
+from Protocols.protocols import httpServerProtocol
+from Protocols.protocols.httpServerProtocol import HttpServerProtocol
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+SLOW_STARTED = threading.Event()
+SLOW_RELEASE = threading.Event()
+
+
+def reply(handler, body: bytes):
+    handler.send_response(200)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+@pytest.fixture(scope="module")
+def http_port(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("http")
+    port = free_port()
+    server = HttpServerProtocol("127.0.0.1", port, logging_path=str(tmp / "server.log"), static_dir=str(tmp))
+    (tmp / "style.css").write_bytes(b"body{}")
+    (tmp / "style.css.gz").write_bytes(gzip.compress(b"body{}"))
+
+    @server.add_handler(url="/x", method="GET")
+    def get_x(handler, params):
+        reply(handler, b"x")
+
+    @server.add_handler(url="/ignore", method="POST")
+    def ignore_body(handler, params):
+        reply(handler, b"ignored")
+
+    @server.add_handler(url="/echo", method="POST")
+    def echo(handler, params):
+        reply(handler, handler.rfile.read())
+
+    @server.add_handler(url="/async/slow", method="GET")
+    async def async_slow(handler, params):
+        # Bloqueia a thread como um handler que faz I/O síncrono no wfile/rfile
+        SLOW_STARTED.set()
+        SLOW_RELEASE.wait(5)
+        reply(handler, b"slow")
+
+    @server.add_handler(url="/async/fast", method="GET")
+    async def async_fast(handler, params):
+        reply(handler, b"fast")
+
+    threading.Thread(target=server.start_http_server, daemon=True).start()
+    for _ in range(50):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except ConnectionRefusedError:
+            threading.Event().wait(0.1)
+    return port
+
+
+def pipeline(port: int, request: bytes, responses: int, timeout: float = 5) -> list[bytes]:
+    # Envia as requisições de uma vez e separa as respostas pelo Content-Length
+    with socket.create_connection(("127.0.0.1", port), timeout=timeout) as sock:
+        sock.sendall(request)
+        stream = sock.makefile("rb")
+        result = []
+        for _ in range(responses):
+            status = stream.readline()
+            length = 0
+            while True:
+                line = stream.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.partition(b":")
+                if name.lower() == b"content-length":
+                    length = int(value)
+            result.append(status.split(b" ", 2)[1] + b" " + stream.read(length))
+        return result
+
+
+@pytest.mark.parametrize("path, expected", [(b"/nope", b"404 Not Found"), (b"/ignore", b"200 ignored")])
+def test_unread_body_does_not_desync_next_request(http_port, path, expected):
+    request = (b"POST " + path + b" HTTP/1.1\r\nHost: x\r\nContent-Length: 11\r\n\r\nhello=world"
+               b"GET /x HTTP/1.1\r\nHost: x\r\n\r\n")
+    assert pipeline(http_port, request, 2) == [expected, b"200 x"]
+
+
+def test_body_read_is_limited_to_content_length(http_port):
+    request = (b"POST /echo HTTP/1.1\r\nHost: x\r\nContent-Length: 5\r\n\r\nhello"
+               b"GET /x HTTP/1.1\r\nHost: x\r\n\r\n")
+    assert pipeline(http_port, request, 2) == [b"200 hello", b"200 x"]
+
+
+def test_unknown_body_length_closes_connection(http_port):
+    # Corpo em chunks não lido pelo handler: a conexão é fechada em vez de reaproveitada
+    request = (b"POST /ignore HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n0\r\n\r\n"
+               b"GET /x HTTP/1.1\r\nHost: x\r\n\r\n")
+    with socket.create_connection(("127.0.0.1", http_port), timeout=5) as sock:
+        sock.sendall(request)
+        data = b""
+        while chunk := sock.recv(65536):
+            data += chunk
+    assert data.startswith(b"HTTP/1.1 200") and data.count(b"HTTP/1.1 ") == 1
+
+
+def test_slow_async_handler_does_not_block_other_connections(http_port):
+    slow = threading.Thread(target=pipeline, args=(http_port, b"GET /async/slow HTTP/1.1\r\nHost: x\r\n\r\n", 1))
+    slow.start()
+    assert SLOW_STARTED.wait(5)
+    try:
+        # Cada conexão roda os handlers assíncronos no seu próprio loop
+        assert pipeline(http_port, b"GET /async/fast HTTP/1.1\r\nHost: x\r\n\r\n", 1, timeout=1) == [b"200 fast"]
+    finally:
+        SLOW_RELEASE.set()
+        slow.join()
+
+
+def test_static_error_after_status_closes_connection(http_port, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("falha simulada")
+
+    # Falha depois do "200" já ter começado: nenhum "500" pode seguir na mesma conexão
+    monkeypatch.setattr(httpServerProtocol, "formatdate", fail)
+    request = b"GET /style.css HTTP/1.1\r\nHost: x\r\n\r\nGET /x HTTP/1.1\r\nHost: x\r\n\r\n"
+    with socket.create_connection(("127.0.0.1", http_port), timeout=5) as sock:
+        sock.sendall(request)
+        data = b""
+        while chunk := sock.recv(65536):
+            data += chunk
+    assert b"500" not in data and data.count(b"HTTP/1.1 ") <= 1
+
+
+def test_precompressed_variant_for_static_text(http_port):
+    conn = http.client.HTTPConnection("127.0.0.1", http_port, timeout=5)
+    try:
+        conn.request("GET", "/style.css", headers={"Accept-Encoding": "gzip"})
+        response = conn.getresponse()
+        assert response.getheader("Content-Encoding") == "gzip"
+        assert response.getheader("Vary") == "Accept-Encoding"
+        assert gzip.decompress(response.read()) == b"body{}"
+
+        conn.request("GET", "/style.css", headers={"Accept-Encoding": "identity"})
+        response = conn.getresponse()
+        assert response.getheader("Content-Encoding") is None
+        assert response.read() == b"body{}"
+    finally:
+        conn.close()
+
+
+def test_compressible_extensions_are_static():
+    # Uma extensão fora da tabela estática nunca chega a serve_static_file
+    assert httpServerProtocol._COMPRESSIBLE_EXTENSIONS <= set(httpServerProtocol._STATIC_EXTENSIONS)
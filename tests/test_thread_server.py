@@ -0,0 +1,163 @@
+import os, sys
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+project_dir = os.path.abspath(os.path.join(current_dir, '..'))
+
+sys.path.append(project_dir)
+
+import socket
+import threading
+import pytest
+from Client.threadcli.client import Client
+from Files import File
+from Server.threadserv.server import Server
+from Options.Ops import Client_ops, Crypt_ops, Server_ops, SyncCrypt_ops, AsyncCrypt_ops
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_client(server: Server):
+    # Espera o laço de accept salvar a conexão e a retira da lista de clientes
+    for _ in range(50):
+        client = server.get_client()
+        if client is not None:
+            return client
+        threading.Event().wait(0.1)
+    raise AssertionError("o servidor não registrou a conexão")
+
+
+def connect_and_wait(server: Server, port: int) -> tuple[socket.socket, object]:
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    return sock, wait_client(server)
+
+
+def start_server(port: int, **options) -> Server:
+    server = Server(Server_ops(port=port, **options))
+    server.daemon = True
+    server.start()
+    for _ in range(50):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except ConnectionRefusedError:
+            server.join(0.1)
+    # A conexão de sondagem acima também foi aceita: descarta para começar do zero
+    wait_client(server).disconnect()
+    return server
+
+
+@pytest.fixture
+def server():
+    port = free_port()
+    server = start_server(port)
+    yield server, port
+    with pytest.raises(SystemExit):
+        server.break_server()
+
+
+def test_reconnect_after_disconnect(server):
+    server, port = server
+    first, first_client = connect_and_wait(server, port)
+    first_client.disconnect()
+    first.close()
+
+    # O laço de accept continua atendendo depois da desconexão, inclusive com o fd reaproveitado
+    for _ in range(3):
+        sock, client = connect_and_wait(server, port)
+        assert client is not first_client
+        assert client.connection.getpeername() == sock.getsockname()
+        client.disconnect()
+        sock.close()
+
+
+def test_sync_crypt_key_without_encoder():
+    crypt_ops = Crypt_ops(SyncCrypt_ops('fernet'), AsyncCrypt_ops('rsa'))
+    server = Server(Server_ops(encrypt_configs=crypt_ops))
+    client = Client(Client_ops(encrypt_configs=crypt_ops))
+    a, b = socket.socketpair()
+    with a, b:
+        client.connection = a
+        # Options padrão (sem encoder/decoder): a troca de chaves usa os bytes crus
+        exchange = threading.Thread(target=server.sync_crypt_key, args=(b,))
+        exchange.start()
+        client.sync_crypt_key()
+        exchange.join()
+        assert client.crypt.sync_crypt.get_key() == server.crypt.sync_crypt.get_key()
+
+
+@pytest.mark.parametrize("size", [10, 500000])
+def test_send_file_round_trip(tmp_path, size):
+    path = tmp_path / "data.bin"
+    data = os.urandom(size // 2) + b"z" * (size - size // 2)
+    path.write_bytes(data)
+    file = File(str(path), "rb")
+    file.open()
+    server = Server(Server_ops())
+    client = Client(Client_ops())
+    a, b = socket.socketpair()
+    with a, b:
+        client.connection = a
+        # Arquivos pequenos saem por sendall e os grandes por sendmsg, ambos a partir do buffer em memória
+        sender = threading.Thread(target=server.send_file, args=(b, file))
+        sender.start()
+        received = client.receive_file()
+        sender.join()
+    assert received.file.read() == data
+
+
+def test_port_is_not_shared_by_default(server):
+    server, port = server
+    with socket.socket() as other:
+        if hasattr(socket, "SO_REUSEPORT"):
+            other.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        # Sem reuse_port nas opções um segundo servidor na mesma porta falha
+        with pytest.raises(OSError):
+            other.bind(("127.0.0.1", port))
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="sem SO_REUSEPORT")
+def test_reuse_port_engines_stop_with_server():
+    port = free_port()
+    server = start_server(port, reuse_port=True, engines=3)
+    engines = [thread for thread in threading.enumerate() if thread.name == "accept-engine"]
+    assert len(engines) == 2
+    for _ in range(6):
+        sock, client = connect_and_wait(server, port)
+        client.disconnect()
+        sock.close()
+    with pytest.raises(SystemExit):
+        server.break_server()
+    # O encerramento aguarda os laços de accept extras
+    assert not any(engine.is_alive() for engine in engines)
+
+
+@pytest.mark.parametrize("size", [100, 5 * 1024 * 1024])
+@pytest.mark.parametrize("encrypted", [False, True])
+def test_receive_message_round_trip(size, encrypted):
+    crypt_ops = Crypt_ops(SyncCrypt_ops('fernet'), AsyncCrypt_ops('rsa')) if encrypted else None
+    server = Server(Server_ops(encrypt_configs=crypt_ops))
+    client = Client(Client_ops(encrypt_configs=crypt_ops))
+    if encrypted:
+        client.crypt.sync_crypt.set_key(server.crypt.sync_crypt.get_key())
+    message = os.urandom(size)
+    a, b = socket.socketpair()
+    with a, b:
+        client.connection = a
+        sender = threading.Thread(target=client.send_message, args=(message,))
+        sender.start()
+        received = server.receive_message(b, 65536)
+        sender.join()
+        assert received == message
+
+        sender = threading.Thread(target=server.send_message, args=(b, message))
+        sender.start()
+        received = client.receive_message(65536)
+        sender.join()
+        assert received == message
+    if not encrypted:
+        # Sem crypt nem decoder o buffer da leitura é devolvido sem uma segunda cópia
+        assert isinstance(received, bytearray)
@@ -0,0 +1,29 @@
+import os, sys
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+project_dir = os.path.abspath(os.path.join(current_dir, '..'))
+
+sys.path.append(project_dir)
+
+import pytest
+from Protocols.protocols.websocket.mask import apply_mask
+
+
+def reference_mask(data: bytes, mask: bytes) -> bytes:
+    return bytes(byte ^ mask[i % 4] for i, byte in enumerate(data))
+
+
+# Cobre os dois caminhos (inteiros grandes e NumPy) e tamanhos fora do múltiplo de 8
+@pytest.mark.parametrize("size", [0, 1, 3, 4, 7, 8, 125, 126, 4095, 4096, 4097, 65535, 65536, 70000])
+def test_apply_mask_matches_reference(size):
+    data = os.urandom(size)
+    mask = os.urandom(4)
+    masked = apply_mask(data, mask)
+    assert masked == reference_mask(data, mask)
+    assert apply_mask(masked, mask) == data
+
+
+def test_apply_mask_accepts_memoryview():
+    data = os.urandom(5000)
+    mask = b"\x01\x02\x03\x04"
+    assert apply_mask(memoryview(data), mask) == reference_mask(data, mask)